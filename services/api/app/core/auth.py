@@ -1,12 +1,15 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Annotated, Any, Optional, Tuple
 import logging
 
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import principal_cache
+from app.core.revocation import revocation_list
 from app.core.security import (
-    verify_password,
-    get_password_hash,
     create_access_token_for_user,
     verify_token
 )
@@ -47,7 +50,22 @@ class LoginResponse(BaseModel):
 # Dependencies
 # -------------------------------
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+@dataclass
+class Principal:
+    """Minimal authenticated identity; the full user is loaded only when asked for"""
+    id: int
+    role: str
+    deletedAt: Optional[datetime] = None
+    _user: Any = field(default=None, repr=False, compare=False)
+
+    async def user(self) -> Any:
+        """The full user with organizations and memberships, loaded once"""
+        if self._user is None:
+            self._user = await load_user(self.id)
+        return self._user
+
+async def get_current_user_id(credentials: HTTPAuthorizationCredentials = Depends(security)) -> int:
+    """User id from a valid access token; does not touch the database"""
     token = credentials.credentials
     payload = verify_token(token)
 
@@ -65,9 +83,28 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="Invalid token payload",
         )
 
+    if (
+        revocation_list.is_family_revoked(payload.get("fam"))
+        or revocation_list.is_user_revoked(int(user_id), payload.get("iat"))
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return int(user_id)
+
+async def load_user(user_id: int):
+    """Load a user with organizations and memberships through the principal cache"""
+    user = await principal_cache.get(user_id)
+    if user is not None:
+        return user
+
+    epoch = principal_cache.epoch
     try:
         user = await prisma.user.find_unique(
-            where={"id": int(user_id)},
+            where={"id": user_id},
             include={
                 "ownedOrganization": True,
                 "primaryOrganization": True,
@@ -87,8 +124,56 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail="User not found",
         )
 
+    await principal_cache.set(user, epoch)
     return user
 
+async def load_identity(user_id: int) -> Optional[Tuple[str, Optional[datetime]]]:
+    """(role, deletedAt) through the principal cache, else a single-row select; None if no such user"""
+    identity = await principal_cache.get_identity(user_id)
+    if identity is not None:
+        return identity
+    cached_user = await principal_cache.get(user_id)
+    if cached_user is not None:
+        return (cached_user.role, cached_user.deletedAt)
+
+    epoch = principal_cache.epoch
+    row = await prisma.query_first('SELECT "role", "deletedAt" FROM "User" WHERE "id" = $1', user_id)
+    if not row:
+        return None
+    identity = (row["role"], row["deletedAt"])
+    await principal_cache.set_identity(user_id, identity, epoch)
+    return identity
+
+async def get_current_principal(user_id: int = Depends(get_current_user_id)) -> Principal:
+    """Active principal from the columns auth checks need"""
+    try:
+        identity = await load_identity(user_id)
+    except Exception as e:
+        logger.error(f"Database error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error"
+        )
+    if identity is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+        )
+
+    role, deleted_at = identity
+    if deleted_at:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Inactive user"
+        )
+    return Principal(id=user_id, role=role, deletedAt=deleted_at)
+
+async def get_current_user(user_id: int = Depends(get_current_user_id)):
+    return await load_user(user_id)
+
+CurrentUserId = Annotated[int, Depends(get_current_user_id)]
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+
 async def get_current_active_user(current_user=Depends(get_current_user)):
     if current_user.deletedAt:
         raise HTTPException(
@@ -132,7 +217,7 @@ async def register(user_data: SignupData):
             detail="User with this email already exists"
         )
 
-    passwordHash = get_password_hash(user_data.password)
+    passwordHash = await password_hasher.hash(user_data.password)
 
     try:
         user = await prisma.user.create({
@@ -162,7 +247,7 @@ async def register(user_data: SignupData):
 async def login(login_data: LoginData):
     try:
         user = await prisma.user.find_unique(where={"email": login_data.email})
-        if not user or not verify_password(login_data.password, user.password):
+        if not user or not await password_hasher.verify(login_data.password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
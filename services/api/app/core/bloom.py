@@ -0,0 +1,51 @@
+import hashlib
+import math
+from typing import Any, Dict
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+
+    ``might_contain`` never returns False for an added item; it returns True
+    for a non-member with probability close to ``error_rate`` while no more
+    than ``capacity`` items have been added. Items cannot be removed.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def might_contain(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    __contains__ = might_contain
+
+    @property
+    def saturated(self) -> bool:
+        return self.count > self.capacity
+
+    def stats(self) -> Dict[str, Any]:
+        set_bits = int.from_bytes(self._bits, "little").bit_count()
+        return {
+            "items": self.count,
+            "capacity": self.capacity,
+            "bits": self.size,
+            "hashes": self.hashes,
+            "fill_ratio": round(set_bits / self.size, 4),
+        }
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
@@ -0,0 +1,138 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend:
+    """Async key/value cache with per-entry TTL and hit/miss counters.
+
+    ``shared`` backends live outside the process, so callers must hand them
+    JSON-serializable values; in-process backends keep objects as they are.
+    """
+    shared = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self._set(key, value, ttl)
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self._delete(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+    async def _get(self, key: str) -> Optional[Any]:
+        raise NotImplementedError
+
+    async def _set(self, key: str, value: Any, ttl: float):
+        raise NotImplementedError
+
+    async def _delete(self, keys: Tuple[str, ...]):
+        raise NotImplementedError
+
+
+class InMemoryLRUCache(CacheBackend):
+    """Per-process LRU cache; the least recently used entry is evicted past ``max_entries``.
+
+    ``on_evict`` is called with the key of every entry dropped for capacity
+    or expiry, so callers can keep side indexes in step.
+    """
+
+    def __init__(self, max_entries: int = 10000, on_evict: Optional[Callable[[str], None]] = None):
+        super().__init__()
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    async def _get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._evicted(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def _set(self, key: str, value: Any, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._evicted(evicted)
+
+    async def _delete(self, keys: Tuple[str, ...]):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def _evicted(self, key: str):
+        if self.on_evict is not None:
+            self.on_evict(key)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "entries": len(self._entries)}
+
+
+class LocalSharedCache(InMemoryLRUCache):
+    """In-process stand-in for the shared backend (development and tests).
+
+    Values go through the same serialization path as Redis, so code that
+    works against it works against a real shared cache.
+    """
+    shared = True
+
+
+class RedisCache(CacheBackend):
+    """Shared cache backed by Redis; requires the optional ``redis`` package"""
+    shared = True
+
+    def __init__(self, url: str):
+        super().__init__()
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.from_url(url, decode_responses=True)
+
+    async def _get(self, key: str) -> Optional[Any]:
+        return await self._client.get(key)
+
+    async def _set(self, key: str, value: Any, ttl: float):
+        await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def _delete(self, keys: Tuple[str, ...]):
+        await self._client.delete(*keys)
+
+
+def create_cache_backend(max_entries: int = 10000) -> CacheBackend:
+    """Build the backend selected by ``CACHE_BACKEND`` ("memory" or "shared")"""
+    if settings.CACHE_BACKEND == "shared":
+        if settings.REDIS_URL:
+            return RedisCache(settings.REDIS_URL)
+        logger.warning("CACHE_BACKEND=shared without REDIS_URL, using the local stand-in")
+        return LocalSharedCache(max_entries)
+    return InMemoryLRUCache(max_entries)
@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Section:
+    """A named unit of work fetched concurrently with its siblings"""
+    fetch: Callable[[], Awaitable[Any]]
+    default: Callable[[], Any]
+    timeout: Optional[float] = None
+
+
+async def _run_section(name: str, section: Section, timeout: Optional[float]) -> Any:
+    """Run one section, degrading to its default on timeout or error"""
+    try:
+        return await asyncio.wait_for(section.fetch(), timeout=section.timeout or timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Section '{name}' timed out after {section.timeout or timeout}s")
+    except Exception as e:
+        logger.error(f"Section '{name}' failed: {e}")
+    return section.default()
+
+
+async def gather_sections(sections: Dict[str, Section], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Fetch independent sections concurrently.
+
+    Each section gets its own timeout (falling back to ``timeout``) and a
+    failing or slow section resolves to its default instead of failing the
+    whole result.
+    """
+    names = list(sections)
+    results = await asyncio.gather(
+        *(_run_section(name, sections[name], timeout) for name in names)
+    )
+    return dict(zip(names, results))
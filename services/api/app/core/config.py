@@ -12,6 +12,7 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    TOKEN_CACHE_MAX_ENTRIES: int = 10000  # Recently verified tokens kept until exp
     
     # OAuth (if using social logins)
     GOOGLE_CLIENT_ID: Optional[str]
@@ -25,6 +26,18 @@ class Settings(BaseSettings):
     BCRYPT_ROUNDS: int = 10
     RESET_TOKEN_EXPIRE_HOURS: int = 24
     VERIFICATION_TOKEN_EXPIRE_HOURS: int = 24
+    PASSWORD_HASH_WORKERS: int = 4  # Threads (and concurrent hashes) for Argon2
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 15.0
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    LOGIN_ACTIVITY_FLUSH_SECONDS: float = 2.0  # Write-behind interval for lastLoginAt/loginCount
+    REGISTRATION_FILTER_MIN_CAPACITY: int = 100000
+    REGISTRATION_FILTER_ERROR_RATE: float = 0.01
+    REGISTRATION_FILTER_SYNC_SECONDS: float = 5.0  # How stale another instance's registrations may be
+    REGISTRATION_FILTER_REBUILD_SECONDS: float = 3600.0
+    AUTH_TOKEN_SWEEP_SECONDS: float = 3600.0
+    AUTH_TOKEN_SWEEP_BATCH_SIZE: int = 1000
+    REVOCATION_SYNC_SECONDS: float = 5.0  # How stale another instance's revocations may be
+    REVOCATION_PRUNE_SECONDS: float = 3600.0
     
     # CORS (comma separated string from env to List)
     CORS_ORIGINS: List[str] = ["http://localhost:3000", "http://localhost:3001", "http://127.0.0.1:3000", "http://127.0.0.1:3001", "https://v1-podacium.vercel.app", ]
@@ -33,6 +46,7 @@ class Settings(BaseSettings):
     APP_NAME: str = "Podacium API"
     DEBUG: bool = True
     ENVIRONMENT: str = "development"
+    LOG_LEVEL: str = "INFO"  # Application loggers; DEBUG adds per-request auth detail
     PORT: int = 8000
     
     # File Upload
@@ -45,9 +59,70 @@ class Settings(BaseSettings):
     SMTP_USER: Optional[str] = None
     SMTP_PASSWORD: Optional[str] = None
     SMTP_USE_SSL: bool = False  # Add this line
+    SMTP_STARTTLS: bool = True  # Ignored with SMTP_USE_SSL; disable for a local stand-in
+    SMTP_FROM_EMAIL: Optional[str] = None  # Defaults to SMTP_USER
+    SMTP_TIMEOUT_SECONDS: float = 30.0
+    SMTP_TRANSPORT: str = "auto"  # "aiosmtplib" if installed, else "thread"
+    SMTP_WORKERS: int = 4  # Threads for the smtplib transport; at least SMTP_POOL_SIZE
+    SMTP_POOL_SIZE: int = 4
+    SMTP_KEEPALIVE_SECONDS: float = 30.0
+    SMTP_IDLE_TIMEOUT_SECONDS: float = 120.0
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+
+    # Email outbox (app/workers/email_worker.py)
+    EMAIL_WORKER_IN_PROCESS: bool = True  # Disable when running the worker as its own process
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 2.0
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 300
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_SECONDS: int = 30
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: int = 3600
+
+    # Newsletter digest (app/workers/digest_worker.py)
+    DIGEST_PAGE_SIZE: int = 200  # Subscribers fetched, rendered and sent per batch
+    DIGEST_PREFETCH_PAGES: int = 2  # Rendered batches allowed to wait for the sender
+    DIGEST_RENDER_CHUNK: int = 50  # Messages rendered between yields to the event loop
+    DIGEST_RECOMMENDATIONS: int = 3
+    DIGEST_RETRY_ROUNDS: int = 2  # Passes over failed recipients at the end of a run
+    DIGEST_RETRY_DELAY_SECONDS: float = 30.0
     
     # Frontend URL for email links
     FRONTEND_URL: str = 'http://localhost:3001'  # Add this line
+    # Public URL of this API, for links mail clients call directly (one-click unsubscribe)
+    API_URL: str = 'http://localhost:8000'
+
+    # Cache ("memory" per process, or "shared" via REDIS_URL / local stand-in)
+    CACHE_BACKEND: str = "memory"
+    REDIS_URL: Optional[str] = None
+
+    # Rate limiting (token buckets per client IP and per email/phone; shared when CACHE_BACKEND is)
+    RATE_LIMIT_ENABLED: bool = True
+    # Must equal the number of proxies in front of the app that append to X-Forwarded-For
+    # (e.g. 1 behind a single load balancer). Any higher and clients can spoof their IP;
+    # 0 ignores the header and uses the peer address
+    TRUSTED_PROXY_COUNT: int = 0
+    RATE_LIMIT_MAX_BUCKETS: int = 100000
+    LOGIN_RATE_LIMIT_IP_BURST: int = 20
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: float = 10.0
+    LOGIN_RATE_LIMIT_IDENTITY_BURST: int = 30  # Per account across all IPs
+    LOGIN_RATE_LIMIT_IDENTITY_PER_MINUTE: float = 10.0
+    LOGIN_RATE_LIMIT_IDENTITY_IP_BURST: int = 10  # Per account from one IP
+    LOGIN_RATE_LIMIT_IDENTITY_IP_PER_MINUTE: float = 3.0
+    PASSWORD_RESET_RATE_LIMIT_IP_BURST: int = 5
+    PASSWORD_RESET_RATE_LIMIT_IP_PER_MINUTE: float = 2.0
+    PASSWORD_RESET_RATE_LIMIT_IDENTITY_BURST: int = 3
+    PASSWORD_RESET_RATE_LIMIT_IDENTITY_PER_MINUTE: float = 0.5
+
+    # Dashboard
+    DASHBOARD_SECTION_TIMEOUT_SECONDS: float = 5.0
+    DASHBOARD_CACHE_TTL_SECONDS: float = 30.0  # Sections are not invalidated on write; this bounds staleness
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 10000
+    DASHBOARD_SUMMARY_MAX_AGE_SECONDS: float = 300.0  # Stats are rebuilt from source rows past this age
+
+    # Recommendations
+    RECOMMENDATION_INDEX_REFRESH_SECONDS: float = 300.0
+    RECOMMENDATION_LATENCY_BUDGET_MS: float = 10.0
+    SKILL_VECTOR_MAX_AGE_SECONDS: float = 900.0  # Skill vectors are recomputed from source rows past this age
 
     @validator("CORS_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v):
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+from app.core.config import settings
+from app.core.security import get_password_hash, verify_password
+
+logger = logging.getLogger(__name__)
+
+
+class PasswordHasher:
+    """Runs password hashing and verification off the event loop.
+
+    Work goes to a dedicated thread pool (argon2-cffi releases the GIL while
+    hashing, so threads run in parallel) and at most ``workers`` jobs are
+    handed to it at once. Callers beyond that wait on a semaphore; ``queued``
+    reports how many are waiting.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = asyncio.Semaphore(workers)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.max_queued = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        """Hash a password without blocking the event loop"""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password without blocking the event loop"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        enqueued = time.perf_counter()
+        waiting = True
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            async with self._slots:
+                self.queued -= 1
+                waiting = False
+                started = time.perf_counter()
+                self._wait_seconds += started - enqueued
+                self.running += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+                finally:
+                    self.running -= 1
+                    self.completed += 1
+                    self._run_seconds += time.perf_counter() - started
+        finally:
+            if waiting:
+                self.queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "queued": self.queued,
+            "running": self.running,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "avg_wait_ms": round(self._wait_seconds / self.completed * 1000, 2) if self.completed else None,
+            "avg_hash_ms": round(self._run_seconds / self.completed * 1000, 2) if self.completed else None,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+
+# Singleton instance
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS)
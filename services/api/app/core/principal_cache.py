@@ -0,0 +1,99 @@
+import logging
+from typing import Any, Dict, Optional, Set
+from app.core.cache import InMemoryLRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """Short-lived per-process cache of authenticated users with their organizations.
+
+    Entries expire after ``PRINCIPAL_CACHE_TTL_SECONDS``, which bounds how
+    long another instance's writes can go unseen. Writers in this process
+    call ``invalidate_user`` after changing a user or their memberships and
+    ``invalidate_organization`` after changing an organization; a reverse
+    index finds every cached user attached to that organization.
+
+    Minimal identities (id, role, deletedAt) used by the lightweight auth
+    dependencies are cached alongside and invalidated with the user.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.ttl = ttl
+        self._backend = InMemoryLRUCache(max_entries, on_evict=self._unlink)
+        self._identities = InMemoryLRUCache(max_entries)
+        self._users_by_org: Dict[int, Set[int]] = {}
+        self._orgs_by_user: Dict[int, Set[int]] = {}
+        # Bumped by every invalidation so a load that raced one is not cached
+        self._epoch = 0
+
+    @property
+    def epoch(self) -> int:
+        return self._epoch
+
+    async def get(self, user_id: int) -> Optional[Any]:
+        return await self._backend.get(self._key(user_id))
+
+    async def set(self, user: Any, epoch: int):
+        """Cache ``user`` unless an invalidation happened since ``epoch`` was read"""
+        if epoch != self._epoch:
+            return
+        self._unlink(self._key(user.id))
+        org_ids = self._organization_ids(user)
+        self._orgs_by_user[user.id] = org_ids
+        for org_id in org_ids:
+            self._users_by_org.setdefault(org_id, set()).add(user.id)
+        await self._backend.set(self._key(user.id), user, self.ttl)
+
+    async def get_identity(self, user_id: int) -> Optional[Any]:
+        return await self._identities.get(self._key(user_id))
+
+    async def set_identity(self, user_id: int, identity: Any, epoch: int):
+        if epoch == self._epoch:
+            await self._identities.set(self._key(user_id), identity, self.ttl)
+
+    async def invalidate_user(self, *user_ids: int):
+        """Drop users after a write to them, their memberships or their deletedAt"""
+        self._epoch += 1
+        for user_id in user_ids:
+            self._unlink(self._key(user_id))
+        keys = [self._key(user_id) for user_id in user_ids]
+        await self._backend.delete(*keys)
+        await self._identities.delete(*keys)
+
+    async def invalidate_organization(self, org_id: int):
+        """Drop every cached user attached to an organization"""
+        await self.invalidate_user(*self._users_by_org.get(org_id, ()))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._backend.stats(),
+            "ttl_seconds": self.ttl,
+            "organizations": len(self._users_by_org),
+            "identities": self._identities.stats(),
+        }
+
+    def _key(self, user_id: int) -> str:
+        return f"principal:{user_id}"
+
+    def _unlink(self, key: str):
+        user_id = int(key.rsplit(":", 1)[1])
+        for org_id in self._orgs_by_user.pop(user_id, ()):
+            users = self._users_by_org.get(org_id)
+            if users is not None:
+                users.discard(user_id)
+                if not users:
+                    del self._users_by_org[org_id]
+
+    def _organization_ids(self, user: Any) -> Set[int]:
+        org_ids = {membership.organizationId for membership in (getattr(user, "memberships", None) or [])}
+        for relation in ("ownedOrganization", "primaryOrganization"):
+            organization = getattr(user, relation, None)
+            if organization is not None:
+                org_ids.add(organization.id)
+        return org_ids
+
+
+# Singleton instance
+principal_cache = PrincipalCache(settings.PRINCIPAL_CACHE_MAX_ENTRIES, settings.PRINCIPAL_CACHE_TTL_SECONDS)
@@ -0,0 +1,225 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitExceeded(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Rate limit exceeded, retry after {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+class TokenBucketBackend:
+    """Token buckets keyed by string.
+
+    ``take`` refills the bucket for the time elapsed since its last use,
+    then removes one token; it returns 0 when a token was available,
+    otherwise the seconds until the next one.
+    """
+    shared = False
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__}
+
+
+class InMemoryTokenBuckets(TokenBucketBackend):
+    """Per-process buckets; the least recently used are dropped past ``max_entries``.
+
+    A dropped bucket simply starts full again, which errs on the side of
+    letting a request through.
+    """
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / refill_per_second
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_entries:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "buckets": len(self._buckets)}
+
+
+# Refill and take atomically on the Redis side; the bucket expires once it would be full again
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisTokenBuckets(TokenBucketBackend):
+    """Buckets shared by every instance; requires the optional ``redis`` package"""
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("REDIS_URL is set but the 'redis' package is not installed") from e
+        self._client = redis.from_url(url, decode_responses=True)
+        self._take = self._client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        result = await self._take(keys=[key], args=[capacity, refill_per_second, time.time()])
+        return float(result)
+
+
+def create_token_bucket_backend() -> TokenBucketBackend:
+    """Build the backend selected by ``CACHE_BACKEND`` ("memory" or "shared")"""
+    if settings.CACHE_BACKEND == "shared":
+        if settings.REDIS_URL:
+            return RedisTokenBuckets(settings.REDIS_URL)
+        logger.warning("CACHE_BACKEND=shared without REDIS_URL, rate limits are per process")
+    return InMemoryTokenBuckets(settings.RATE_LIMIT_MAX_BUCKETS)
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """``capacity`` attempts at once, refilled at ``per_minute`` attempts per minute"""
+    capacity: int
+    per_minute: float
+
+    @property
+    def refill_per_second(self) -> float:
+        return self.per_minute / 60
+
+
+class RateLimiter:
+    """Token-bucket limits for one endpoint group, per client IP and per identity.
+
+    ``check`` is a few dictionary operations (or Redis round trips) and is
+    meant to run before any database lookup or password verify. Identities
+    (email or phone) are normalized so case and whitespace variants share a
+    bucket. The per-identity bucket is global, so attempts spread over many
+    IPs still add up for one account. The optional ``per_identity_ip``
+    bucket is tighter and checked first, so a single client runs out well
+    before it can drain the global bucket and lock the owner out.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        backend: TokenBucketBackend,
+        per_ip: Bucket,
+        per_identity: Bucket,
+        per_identity_ip: Optional[Bucket] = None
+    ):
+        self.name = name
+        self.backend = backend
+        self.per_ip = per_ip
+        self.per_identity = per_identity
+        self.per_identity_ip = per_identity_ip
+        self.allowed = 0
+        self.rejected_ip = 0
+        self.rejected_identity_ip = 0
+        self.rejected_identity = 0
+
+    async def check(self, ip: Optional[str], identity: Optional[str]):
+        """Consume one attempt; raises ``RateLimitExceeded`` when either bucket is empty"""
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        if ip:
+            retry_after = await self._take(f"ip:{ip}", self.per_ip)
+            if retry_after:
+                self.rejected_ip += 1
+                raise RateLimitExceeded(retry_after)
+        if identity:
+            key = f"id:{identity.strip().lower()}"
+            if ip and self.per_identity_ip:
+                retry_after = await self._take(f"{key}@{ip}", self.per_identity_ip)
+                if retry_after:
+                    self.rejected_identity_ip += 1
+                    raise RateLimitExceeded(retry_after)
+            retry_after = await self._take(key, self.per_identity)
+            if retry_after:
+                self.rejected_identity += 1
+                raise RateLimitExceeded(retry_after)
+        self.allowed += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "rejected_ip": self.rejected_ip,
+            "rejected_identity_ip": self.rejected_identity_ip,
+            "rejected_identity": self.rejected_identity,
+        }
+
+    async def _take(self, key: str, bucket: Bucket) -> float:
+        try:
+            return await self.backend.take(f"ratelimit:{self.name}:{key}", bucket.capacity, bucket.refill_per_second)
+        except Exception as e:
+            # Fail open: an unavailable shared backend must not lock everyone out
+            logger.error(f"Rate limit backend failed: {e}")
+            return 0.0
+
+
+def retry_after_header(error: RateLimitExceeded) -> Dict[str, str]:
+    return {"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+
+
+# Singleton instances
+token_buckets = create_token_bucket_backend()
+
+login_limiter = RateLimiter(
+    "login",
+    token_buckets,
+    per_ip=Bucket(settings.LOGIN_RATE_LIMIT_IP_BURST, settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE),
+    per_identity=Bucket(settings.LOGIN_RATE_LIMIT_IDENTITY_BURST, settings.LOGIN_RATE_LIMIT_IDENTITY_PER_MINUTE),
+    per_identity_ip=Bucket(
+        settings.LOGIN_RATE_LIMIT_IDENTITY_IP_BURST,
+        settings.LOGIN_RATE_LIMIT_IDENTITY_IP_PER_MINUTE
+    )
+)
+
+password_reset_limiter = RateLimiter(
+    "password_reset",
+    token_buckets,
+    per_ip=Bucket(settings.PASSWORD_RESET_RATE_LIMIT_IP_BURST, settings.PASSWORD_RESET_RATE_LIMIT_IP_PER_MINUTE),
+    per_identity=Bucket(
+        settings.PASSWORD_RESET_RATE_LIMIT_IDENTITY_BURST,
+        settings.PASSWORD_RESET_RATE_LIMIT_IDENTITY_PER_MINUTE
+    )
+)
+
+
+def rate_limit_stats() -> Dict[str, Any]:
+    return {
+        **token_buckets.stats(),
+        "login": login_limiter.stats(),
+        "password_reset": password_reset_limiter.stats(),
+    }
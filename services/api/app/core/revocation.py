@@ -0,0 +1,193 @@
+import asyncio
+import calendar
+import hashlib
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.core.prisma import prisma
+from app.generated.prisma.errors import UniqueViolationError
+
+logger = logging.getLogger(__name__)
+
+TOKEN = "token"
+FAMILY = "family"
+USER = "user"
+
+_PAGE_SIZE = 5000
+# Ids are allocated before commit, so a sync re-reads this many ids below the last one seen
+_SYNC_OVERLAP_IDS = 1000
+
+
+def _digest(value: str) -> bytes:
+    return hashlib.blake2b(value.encode(), digest_size=16).digest()
+
+
+class RevocationList:
+    """Revoked refresh tokens (by ``jti``), token families (by ``fam``) and users.
+
+    ``RevokedToken`` is the source of truth; every instance mirrors it into
+    two sets of 16-byte digests, plus the time each revoked user's sessions
+    were cut off, so checks are constant time and never hit the database.
+    New rows are pulled by id every ``REVOCATION_SYNC_SECONDS``, re-reading
+    a trailing range of ids so rows committed out of id order are not
+    missed; expired rows are pruned from the table and the sets rebuilt
+    every ``REVOCATION_PRUNE_SECONDS``. Revoking a token relies on the
+    table's unique index, so two instances cannot both rotate the same
+    refresh token.
+    """
+
+    def __init__(self, sync_interval: float, prune_interval: float):
+        self.sync_interval = sync_interval
+        self.prune_every = max(1, int(prune_interval // sync_interval))
+        self._tokens: Set[bytes] = set()
+        self._families: Set[bytes] = set()
+        # User id -> epoch second up to which the user's tokens are revoked
+        self._users: Dict[int, int] = {}
+        self._last_id = 0
+        self._revoked_while_loading: Optional[List[Tuple[str, Any]]] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.reuse_detected = 0
+
+    def is_token_revoked(self, jti: str) -> bool:
+        return _digest(jti) in self._tokens
+
+    def is_family_revoked(self, family: Optional[str]) -> bool:
+        return family is not None and _digest(family) in self._families
+
+    def is_user_revoked(self, user_id: int, issued_at: Any) -> bool:
+        """Whether a token issued at ``issued_at`` (epoch seconds, None if unknown) predates a user revocation"""
+        revoked_at = self._users.get(user_id)
+        if revoked_at is None:
+            return False
+        return not isinstance(issued_at, (int, float)) or issued_at <= revoked_at
+
+    async def revoke_token(self, jti: str, user_id: Optional[int], expires_at: datetime, reason: str) -> bool:
+        """Revoke one token; False if it was already revoked (e.g. rotated by a concurrent request)"""
+        inserted = await self._insert(TOKEN, jti, user_id, expires_at, reason)
+        # Only once recorded: after a failed write the client's retry must not look like reuse
+        self._add(TOKEN, jti)
+        return inserted
+
+    async def revoke_family(self, family: str, user_id: Optional[int], expires_at: datetime, reason: str):
+        """Revoke every token issued in a login session"""
+        await self._insert(FAMILY, family, user_id, expires_at, reason)
+        self._add(FAMILY, family)
+
+    async def revoke_user(self, user_id: int, expires_at: datetime, reason: str):
+        """Revoke every token issued to a user until now (e.g. on deactivation)"""
+        revoked_at = calendar.timegm(datetime.utcnow().utctimetuple())
+        await self._insert(USER, f"{user_id}:{revoked_at}", user_id, expires_at, reason)
+        self._add(USER, f"{user_id}:{revoked_at}")
+
+    def record_reuse(self):
+        self.reuse_detected += 1
+
+    async def sync(self):
+        """Pull revocations recorded since the last sync (possibly by other instances)"""
+        since_id = max(0, self._last_id - _SYNC_OVERLAP_IDS)
+        last_id = await self._pull(since_id, self._tokens, self._families, self._users)
+        self._last_id = max(self._last_id, last_id)
+
+    async def reload(self):
+        """Prune expired revocations and rebuild the sets from what is left"""
+        await prisma.execute_raw(
+            'DELETE FROM "RevokedToken" WHERE "expiresAt" <= (now() AT TIME ZONE \'UTC\')'
+        )
+        self._revoked_while_loading = []
+        tokens: Set[bytes] = set()
+        families: Set[bytes] = set()
+        users: Dict[int, int] = {}
+        last_id = await self._pull(0, tokens, families, users)
+        # Keep what this instance revoked while the new sets were loading
+        for kind, value in self._revoked_while_loading:
+            self._apply(kind, value, tokens, families, users)
+        self._tokens, self._families, self._users, self._last_id = tokens, families, users, last_id
+        self._revoked_while_loading = None
+
+    async def start(self):
+        """Load the list before serving, then keep it in sync in the background"""
+        try:
+            await self.reload()
+        except Exception as e:
+            logger.error(f"Initial revocation list load failed: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "revoked_tokens": len(self._tokens),
+            "revoked_families": len(self._families),
+            "revoked_users": len(self._users),
+            "last_id": self._last_id,
+            "reuse_detected": self.reuse_detected,
+        }
+
+    async def _pull(self, since_id: int, tokens: Set[bytes], families: Set[bytes], users: Dict[int, int]) -> int:
+        while True:
+            rows = await prisma.query_raw(
+                'SELECT "id", "kind", "value" FROM "RevokedToken" WHERE "id" > $1 ORDER BY "id" LIMIT $2',
+                since_id,
+                _PAGE_SIZE
+            )
+            for row in rows:
+                self._apply(row["kind"], row["value"], tokens, families, users)
+            if rows:
+                since_id = rows[-1]["id"]
+            if len(rows) < _PAGE_SIZE:
+                return since_id
+
+    def _add(self, kind: str, value: str):
+        self._apply(kind, value, self._tokens, self._families, self._users)
+        if self._revoked_while_loading is not None:
+            self._revoked_while_loading.append((kind, value))
+
+    @staticmethod
+    def _apply(kind: str, value: str, tokens: Set[bytes], families: Set[bytes], users: Dict[int, int]):
+        if kind == USER:
+            # "<user id>:<revoked at>"; the latest revocation of a user wins
+            user_id, revoked_at = (int(part) for part in value.split(":"))
+            users[user_id] = max(users.get(user_id, 0), revoked_at)
+        else:
+            (families if kind == FAMILY else tokens).add(_digest(value))
+
+    async def _insert(self, kind: str, value: str, user_id: Optional[int], expires_at: datetime, reason: str) -> bool:
+        try:
+            await prisma.revokedtoken.create(
+                data={
+                    "kind": kind,
+                    "value": value,
+                    "userId": user_id,
+                    "reason": reason,
+                    "expiresAt": expires_at
+                }
+            )
+            return True
+        except UniqueViolationError:
+            return False
+
+    async def _sync_loop(self):
+        iteration = 0
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            iteration += 1
+            try:
+                if iteration % self.prune_every == 0:
+                    await self.reload()
+                else:
+                    await self.sync()
+            except Exception as e:
+                logger.error(f"Revocation list sync failed: {e}")
+
+
+# Singleton instance
+revocation_list = RevocationList(settings.REVOCATION_SYNC_SECONDS, settings.REVOCATION_PRUNE_SECONDS)
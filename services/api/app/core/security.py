@@ -1,8 +1,9 @@
+import uuid
 from datetime import datetime, timedelta
-from typing import Optional, Any, Dict
-from jose import JWTError, jwt
+from typing import Optional, Any, Dict, Tuple
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.tokens import token_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,23 +23,15 @@ SECRET_KEY = settings.JWT_SECRET_KEY
 ALGORITHM = settings.JWT_ALGORITHM
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
 REFRESH_TOKEN_EXPIRE_DAYS = settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
+REFRESH_TOKEN_LIFETIME = timedelta(days=365)
+UNSUBSCRIBE_TOKEN_LIFETIME = timedelta(days=365)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash"""
     try:
-        print(f"🔧 SECURITY DEBUG: Verifying password")
-        print(f"🔧 SECURITY DEBUG: Plain password: '{plain_password}'")
-        print(f"🔧 SECURITY DEBUG: Hashed password: {hashed_password}")
-        print(f"🔧 SECURITY DEBUG: Hash starts with $argon2: {hashed_password.startswith('$argon2')}")
-        
-        result = pwd_context.verify(plain_password, hashed_password)
-        print(f"🔧 SECURITY DEBUG: Verification result: {result}")
-        
-        return result
+        return pwd_context.verify(plain_password, hashed_password)
     except Exception as e:
-        print(f"❌ SECURITY DEBUG: Password verification error: {str(e)}")
-        import traceback
-        print(f"🔴 SECURITY TRACEBACK: {traceback.format_exc()}")
+        logger.warning(f"Password verification error: {e}")
         return False
 
 def get_password_hash(password: str) -> str:
@@ -70,9 +63,10 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     
     to_encode.update({
         "exp": expire,
+        "iat": datetime.utcnow(),
         "type": "access"
     })
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return token_service.encode(to_encode)
 
 def create_refresh_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT refresh token with custom data"""
@@ -85,25 +79,45 @@ def create_refresh_token(data: Dict[str, Any], expires_delta: Optional[timedelta
     
     to_encode.update({
         "exp": expire,
+        "iat": datetime.utcnow(),
         "type": "refresh"
     })
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    return token_service.encode(to_encode)
 
-def create_refresh_token_for_user(user_id: int) -> str:
-    """Create refresh token with very long expiration (1 year)"""
-    expires_delta = timedelta(days=365)  # 1 year expiration
-    return create_refresh_token({"sub": str(user_id)}, expires_delta)  # Now this will work
+def create_refresh_token_for_user(user_id: int, family: Optional[str] = None) -> str:
+    """Create refresh token with very long expiration (1 year).
+
+    Each refresh token has its own ``jti`` and carries the ``fam`` (login
+    session) it was rotated within; a new family is started when none is given.
+    """
+    return create_refresh_token(
+        {"sub": str(user_id), "jti": uuid.uuid4().hex, "fam": family or uuid.uuid4().hex},
+        REFRESH_TOKEN_LIFETIME
+    )
 
 # In app/core/security.py - Update token creation functions
-def create_access_token_for_user(user_id: int) -> str:
+def create_access_token_for_user(user_id: int, family: Optional[str] = None) -> str:
     """Create access token with long expiration (30 days)"""
     expires_delta = timedelta(days=30)  # Changed from 30 minutes to 30 days
-    return create_access_token({"sub": str(user_id)}, expires_delta)
+    data = {"sub": str(user_id)}
+    if family:
+        data["fam"] = family
+    return create_access_token(data, expires_delta)
+
+def create_token_pair(user_id: int, family: Optional[str] = None) -> Tuple[str, str]:
+    """Access and refresh token for one login session, so revoking the family revokes both"""
+    family = family or uuid.uuid4().hex
+    return create_access_token_for_user(user_id, family), create_refresh_token_for_user(user_id, family)
+
+def create_unsubscribe_token(user_id: int) -> str:
+    """Token for the one-click newsletter unsubscribe link in digest emails"""
+    return token_service.encode({
+        "sub": str(user_id),
+        "exp": datetime.utcnow() + UNSUBSCRIBE_TOKEN_LIFETIME,
+        "iat": datetime.utcnow(),
+        "type": "unsubscribe"
+    })
 
 def verify_token(token: str) -> Optional[Dict[str, Any]]:
     """Verify and decode JWT token"""
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except JWTError:
-        return None
\ No newline at end of file
+    return token_service.decode(token)
\ No newline at end of file
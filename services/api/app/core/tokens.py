@@ -0,0 +1,174 @@
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from jose import JWTError, jwt
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _cache_key(token: str) -> bytes:
+    """Digest the cache is keyed on, so live bearer tokens are not kept in memory"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def _timestamp(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return calendar.timegm(value.utctimetuple())
+    return value
+
+
+class TokenService:
+    """JWT encoding and verification with an HMAC fast path.
+
+    For HS* algorithms the key and the encoded header are prepared once and
+    tokens are signed and checked with ``hmac`` directly. Tokens that
+    verified recently are remembered by digest (up to
+    ``TOKEN_CACHE_MAX_ENTRIES``) until their ``exp``, so repeat requests with the same bearer token skip
+    the signature check and JSON parsing. Other algorithms use python-jose.
+    """
+
+    def __init__(self, secret: str, algorithm: str, max_cached: int = 10000):
+        self.secret = secret
+        self.algorithm = algorithm
+        self.max_cached = max_cached
+        self._digest = _HMAC_DIGESTS.get(algorithm)
+        self._key = secret.encode()
+        header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":"), sort_keys=True)
+        self._header = _b64encode(header.encode())
+        self._verified: "OrderedDict[bytes, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._metrics = {
+            "encoded": 0,
+            "encode_seconds": 0.0,
+            "decoded": 0,
+            "decode_seconds": 0.0,
+            "cache_hits": 0,
+            "rejected": 0,
+        }
+
+    def encode(self, claims: Dict[str, Any]) -> str:
+        """Sign ``claims``; datetime values of exp/iat/nbf become epoch seconds"""
+        started = time.perf_counter()
+        try:
+            if self._digest is None:
+                return jwt.encode(claims, self.secret, algorithm=self.algorithm)
+            payload = {
+                name: _timestamp(value) if name in ("exp", "iat", "nbf") else value
+                for name, value in claims.items()
+            }
+            body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+            signing_input = self._header + b"." + body
+            signature = _b64encode(hmac.new(self._key, signing_input, self._digest).digest())
+            return (signing_input + b"." + signature).decode()
+        finally:
+            self._metrics["encoded"] += 1
+            self._metrics["encode_seconds"] += time.perf_counter() - started
+
+    def decode(self, token: str) -> Optional[Dict[str, Any]]:
+        """Verify signature and exp/nbf; returns the claims or None"""
+        started = time.perf_counter()
+        try:
+            now = time.time()
+            key = _cache_key(token)
+            cached = self._verified.get(key)
+            if cached is not None:
+                expires_at, claims = cached
+                if expires_at > now:
+                    self._verified.move_to_end(key)
+                    self._metrics["cache_hits"] += 1
+                    return dict(claims)
+                del self._verified[key]
+
+            claims = self._verify(token, now)
+            if claims is None:
+                self._metrics["rejected"] += 1
+                return None
+            if isinstance(claims.get("exp"), (int, float)):
+                self._remember(key, claims["exp"], claims)
+            return dict(claims)
+        finally:
+            self._metrics["decoded"] += 1
+            self._metrics["decode_seconds"] += time.perf_counter() - started
+
+    def stats(self) -> Dict[str, Any]:
+        metrics = self._metrics
+        return {
+            "algorithm": self.algorithm,
+            "fast_path": self._digest is not None,
+            "cached_tokens": len(self._verified),
+            "encoded": metrics["encoded"],
+            "decoded": metrics["decoded"],
+            "cache_hits": metrics["cache_hits"],
+            "rejected": metrics["rejected"],
+            "avg_encode_us": round(metrics["encode_seconds"] / metrics["encoded"] * 1e6, 2) if metrics["encoded"] else None,
+            "avg_decode_us": round(metrics["decode_seconds"] / metrics["decoded"] * 1e6, 2) if metrics["decoded"] else None,
+        }
+
+    def clear(self):
+        self._verified.clear()
+
+    def _verify(self, token: str, now: float) -> Optional[Dict[str, Any]]:
+        try:
+            header, body, signature = token.split(".")
+        except ValueError:
+            return None
+
+        if self._digest is None or header.encode() != self._header:
+            # Unusual header (or a non-HMAC algorithm): let jose validate it fully
+            try:
+                return jwt.decode(token, self.secret, algorithms=[self.algorithm])
+            except JWTError:
+                return None
+
+        try:
+            expected = hmac.new(self._key, f"{header}.{body}".encode(), self._digest).digest()
+            if not hmac.compare_digest(expected, _b64decode(signature)):
+                return None
+            claims = json.loads(_b64decode(body))
+        except (ValueError, TypeError):
+            return None
+        if not isinstance(claims, dict):
+            return None
+
+        exp = claims.get("exp")
+        if exp is not None and (not isinstance(exp, (int, float)) or exp <= now):
+            return None
+        nbf = claims.get("nbf")
+        if nbf is not None and (not isinstance(nbf, (int, float)) or nbf > now):
+            return None
+        return claims
+
+    def _remember(self, key: bytes, expires_at: float, claims: Dict[str, Any]):
+        self._verified[key] = (expires_at, claims)
+        self._verified.move_to_end(key)
+        while len(self._verified) > self.max_cached:
+            self._verified.popitem(last=False)
+
+
+# Singleton instance
+token_service = TokenService(
+    settings.JWT_SECRET_KEY,
+    settings.JWT_ALGORITHM,
+    settings.TOKEN_CACHE_MAX_ENTRIES
+)
@@ -2,6 +2,7 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional
+import logging
 import time
 import os
 import subprocess
@@ -10,11 +11,29 @@ from pathlib import Path
 
 from app.core.config import settings
 from app.core.prisma import connect_prisma, disconnect_prisma, prisma
-from app.core.security import get_password_hash, verify_password
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import principal_cache
+from app.core.rate_limit import rate_limit_stats
+from app.core.revocation import revocation_list
+from app.core.tokens import token_service
+from app.services.auth_token_store import auth_token_store
+from app.services.dashboard_cache import dashboard_cache
+from app.services.login_activity import login_activity
+from app.services.registration_filter import registration_filter
+from app.services.recommendation_service import recommendation_service
+from app.services.skill_vector_service import skill_vector_service
+from app.services.smtp_transport import smtp_transport
+from app.services.email_outbox import email_outbox
+from app.workers.email_worker import email_worker
 
 from app.routers import (
     auth, users, organizations, education, freelancing, 
-    bi, payments, files, dashboard
+    bi, payments, files, dashboard, newsletter
+)
+
+logging.basicConfig(
+    level=settings.LOG_LEVEL.upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
 )
 
 # App init
@@ -99,6 +118,15 @@ async def startup():
                 print(f"📊 Database test successful: {user_count} users found")
             except Exception as e:
                 print(f"⚠️ Database test failed: {e}")
+            
+            await recommendation_service.start()
+            login_activity.start()
+            registration_filter.start()
+            auth_token_store.start()
+            await revocation_list.start()
+            smtp_transport.start()
+            if settings.EMAIL_WORKER_IN_PROCESS:
+                email_worker.start()
                 
         except Exception as e:
             print(f"❌ Database connection failed: {e}")
@@ -109,6 +137,14 @@ async def startup():
 
 @app.on_event("shutdown")
 async def shutdown():
+    await recommendation_service.stop()
+    await login_activity.stop()
+    await registration_filter.stop()
+    await auth_token_store.stop()
+    await revocation_list.stop()
+    password_hasher.shutdown()
+    await email_worker.stop()
+    await smtp_transport.stop()
     try:
         await disconnect_prisma()
         print("✅ Database disconnected")
@@ -127,6 +163,7 @@ app.include_router(freelancing.router, prefix=api_prefix, tags=["Freelancing"])
 app.include_router(bi.router, prefix=api_prefix, tags=["Business Intelligence"])
 app.include_router(payments.router, prefix=api_prefix, tags=["Payments & Subscriptions"])
 app.include_router(files.router, prefix=api_prefix, tags=["Files"])
+app.include_router(newsletter.router, prefix=api_prefix, tags=["Newsletter"])
 
 # Basic routes
 @app.get("/")
@@ -202,7 +239,15 @@ async def register(user_data: SignupData):
 
 @app.post("/api/auth/check-email")
 async def check_email(email: dict):
-    return {"available": True}
+    address = (email.get("email") or "").strip()
+    if not address:
+        raise HTTPException(status_code=400, detail="Email is required")
+    # A definite miss in the filter means the address is free without a query; the filter
+    # follows registrations made elsewhere within REGISTRATION_FILTER_SYNC_SECONDS
+    if not registration_filter.email_maybe_taken(address):
+        return {"available": True}
+    user = await prisma.user.find_unique(where={"email": address})
+    return {"available": user is None}
 
 @app.get("/api/debug/users")
 async def debug_users():
@@ -251,6 +296,32 @@ async def debug_engine_status():
     
     return info
 
+@app.get("/api/debug/metrics")
+async def debug_metrics():
+    """In-process cache and worker metrics"""
+    metrics = {
+        "dashboard_cache": dashboard_cache.stats(),
+        "recommendations": recommendation_service.stats(),
+        "skill_vectors": skill_vector_service.stats(),
+        "password_hasher": password_hasher.stats(),
+        "principal_cache": principal_cache.stats(),
+        "tokens": token_service.stats(),
+        "login_activity": login_activity.stats(),
+        "registration_filter": registration_filter.stats(),
+        "auth_tokens": auth_token_store.stats(),
+        "revocation": revocation_list.stats(),
+        "rate_limit": rate_limit_stats(),
+        "smtp": smtp_transport.stats(),
+        "email_worker": email_worker.stats(),
+    }
+    # Outbox depth comes from the database, so it is reported even when no worker runs
+    try:
+        metrics["email_outbox"] = await email_outbox.stats()
+    except Exception as e:
+        metrics["email_outbox"] = {"error": str(e)}
+
+    return metrics
+
 app.include_router(dashboard.router, prefix=api_prefix, tags=["Dashboard"])
     
 if __name__ == "__main__":
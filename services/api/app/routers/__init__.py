@@ -7,6 +7,7 @@ from .bi import router as bi_router
 from .payments import router as payments_router
 from .files import router as files_router
 from .dashboard import router as dashboard_router
+from .newsletter import router as newsletter_router
 
 __all__ = [
     "auth_router",
@@ -18,5 +19,6 @@ __all__ = [
     "payments_router",
     "files_router",
     "dashboard_router",  # Add this
+    "newsletter_router",
 
 ]
\ No newline at end of file
@@ -1,53 +1,68 @@
-from fastapi import APIRouter, Depends, HTTPException, status, BackgroundTasks
-from fastapi.security import HTTPBearer
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from app.schemas.auth import (
     UserRegister, UserLogin, Token, PasswordResetRequest, 
     PasswordReset, EmailVerificationRequest, UserResponse,
     RefreshTokenRequest
 )
 from app.services.auth_service import auth_service
-from app.services.email_service import EmailService
-from app.core.auth import get_current_active_user
+from app.services.auth_token_store import auth_token_store
+from app.core.auth import CurrentPrincipal, get_current_active_user
+from app.core.config import settings
+from app.core.rate_limit import (
+    RateLimiter,
+    RateLimitExceeded,
+    login_limiter,
+    password_reset_limiter,
+    retry_after_header,
+)
+from app.core.revocation import revocation_list
 from app.core.security import (
-    create_access_token_for_user, 
-    create_refresh_token_for_user,
+    REFRESH_TOKEN_LIFETIME,
+    create_token_pair,
     verify_token,
-    create_access_token,
-    create_refresh_token,
 )
-from app.core.security import verify_password
-from app.core.prisma import prisma
 import logging
 from datetime import datetime
+from typing import Optional
 
 router = APIRouter(prefix="/auth", tags=["authentication"])
 security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
+def _client_ip(request: Request) -> Optional[str]:
+    """Client address as seen by the outermost trusted proxy.
+
+    Each trusted proxy appends the address it received the request from to
+    X-Forwarded-For, so the entry ``TRUSTED_PROXY_COUNT`` from the right is
+    the client; anything further left is client-supplied and ignored. With
+    the default of 0 the header is not trusted at all.
+    """
+    peer = request.client.host if request.client else None
+    if settings.TRUSTED_PROXY_COUNT <= 0:
+        return peer
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    if len(forwarded) < settings.TRUSTED_PROXY_COUNT:
+        return peer
+    return forwarded[-settings.TRUSTED_PROXY_COUNT]
+
+async def _throttle(limiter: RateLimiter, request: Request, identity: str = None):
+    """Reject with 429 before any lookup or password verify once a bucket is empty"""
+    try:
+        await limiter.check(_client_ip(request), identity)
+    except RateLimitExceeded as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, try again later",
+            headers=retry_after_header(e)
+        )
+
 @router.post("/register", response_model=dict, status_code=status.HTTP_201_CREATED)
-async def register(
-    user_data: UserRegister,
-    background_tasks: BackgroundTasks
-):
+async def register(user_data: UserRegister):
     """Register a new user (compatible with existing frontend)"""
-    email_service = EmailService()
-    
     try:
-        print(f"🔧 ROUTER DEBUG: Registration request received")
-        print(f"🔧 ROUTER DEBUG: User data validated: {user_data.dict()}")
-        
-        user, verification_token = await auth_service.create_user(user_data)
-        
-        print(f"✅ ROUTER DEBUG: User created successfully with ID: {user['id']}")
-        
-        # Send verification email in background
-        if user_data.email and user_data.provider == "EMAIL":
-            background_tasks.add_task(
-                email_service.send_verification_email,
-                user_data.email,
-                verification_token,
-                user_data.fullName
-            )
+        # The verification email is queued in the outbox with the user
+        user, _ = await auth_service.create_user(user_data)
         
         return {
             "message": "User registered successfully",
@@ -56,16 +71,13 @@ async def register(
         }
     
     except ValueError as e:
-        print(f"❌ ROUTER DEBUG: Registration error: {e}")
+        logger.info(f"Registration rejected: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
     except Exception as e:
-        print(f"❌ ROUTER DEBUG: Unexpected registration error: {e}")
-        import traceback
-        error_details = traceback.format_exc()
-        print(f"🔴 FULL TRACEBACK:\n{error_details}")
+        logger.exception("Unexpected registration error")
         
         # Return the actual error to frontend for debugging
         raise HTTPException(
@@ -74,68 +86,32 @@ async def register(
         )
 
 @router.post("/login")
-async def login(login_data: UserLogin):
+async def login(login_data: UserLogin, request: Request):
     """User login"""
+    await _throttle(login_limiter, request, login_data.email or login_data.phoneNumber)
     try:
-        print(f"🔧 LOGIN DEBUG: Starting login for {login_data.email}")
-        print(f"🔧 LOGIN DEBUG: Login data: {login_data.dict()}")
-        
-        # Find user by email
-        user = await prisma.user.find_unique(where={"email": login_data.email})
-        print(f"🔧 LOGIN DEBUG: User found: {user.id if user else 'None'}")
-        
-        if not user:
-            print("❌ LOGIN DEBUG: User not found")
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid credentials"
+        try:
+            user = await auth_service.authenticate_user(
+                email=login_data.email,
+                phone_number=login_data.phoneNumber,
+                password=login_data.password
             )
-
-        print(f"🔧 LOGIN DEBUG: User details - ID: {user.id}, Email: {user.email}")
-        print(f"🔧 LOGIN DEBUG: Password hash: {user.passwordHash}")
-        
-        # Verify password
-        print(f"🔧 LOGIN DEBUG: Verifying password...")
-        from app.core.security import verify_password
-        password_valid = verify_password(login_data.password, user.passwordHash)
-        print(f"🔧 LOGIN DEBUG: Password verification result: {password_valid}")
-        
-        if not password_valid:
-            print("❌ LOGIN DEBUG: Password verification failed")
+        except ValueError:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid credentials"
+                detail="Account deactivated"
             )
-
-        print("✅ LOGIN DEBUG: Password verified successfully")
         
-        # Check if user is active
-        if user.deletedAt:
-            print("❌ LOGIN DEBUG: User account is deactivated")
+        if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Account deactivated"
+                detail="Invalid credentials"
             )
 
-        print("✅ LOGIN DEBUG: User account is active")
+        logger.debug(f"User {user['id']} authenticated")
         
         # Create tokens
-        print("🔧 LOGIN DEBUG: Creating access token...")
-        access_token = create_access_token_for_user(user.id)
-        print("🔧 LOGIN DEBUG: Creating refresh token...")
-        refresh_token = create_refresh_token_for_user(user.id)
-        
-        print(f"✅ LOGIN DEBUG: Tokens created successfully")
-        print(f"🔧 LOGIN DEBUG: Access token: {access_token[:50]}...")
-        print(f"🔧 LOGIN DEBUG: Refresh token: {refresh_token[:50]}...")
-
-        # Update last login
-        await prisma.user.update(
-            where={"id": user.id},
-            data={"lastLoginAt": datetime.utcnow()}
-        )
-
-        print("✅ LOGIN DEBUG: Login completed successfully")
+        access_token, refresh_token = create_token_pair(user["id"])
         
         return {
             "access_token": access_token,
@@ -145,12 +121,9 @@ async def login(login_data: UserLogin):
         }
 
     except HTTPException as he:
-        print(f"❌ LOGIN DEBUG: HTTPException: {he.detail}")
         raise he
     except Exception as e:
-        print(f"❌ LOGIN DEBUG: Unexpected exception: {str(e)}")
-        import traceback
-        print(f"🔴 LOGIN TRACEBACK:\n{traceback.format_exc()}")
+        logger.exception("Unexpected login error")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Login failed: {str(e)}"
@@ -172,33 +145,20 @@ async def verify_email(verification_data: EmailVerificationRequest):
 @router.post("/forgot-password")
 async def forgot_password(
     reset_request: PasswordResetRequest,
-    background_tasks: BackgroundTasks
+    request: Request
 ):
     """Request password reset email"""
-    email_service = EmailService()
+    await _throttle(password_reset_limiter, request, reset_request.email)
     
     try:
-        print(f"🔐 Forgot password request for: {reset_request.email}")
-        
-        reset_token = await auth_service.create_password_reset_token(reset_request.email)
-        
-        if reset_token:
-            # Get user for name
-            user = await auth_service.get_user_by_email(reset_request.email)
-            if user:
-                background_tasks.add_task(
-                    email_service.send_password_reset_email,
-                    reset_request.email,
-                    reset_token,
-                    user["fullName"]
-                )
-                print(f"✅ Password reset email sent to: {reset_request.email}")
+        # Queues the reset email in the outbox when the user exists
+        await auth_service.create_password_reset_token(reset_request.email)
         
         # Always return success to prevent email enumeration
         return {"message": "If the email exists, a reset link has been sent"}
     
     except Exception as e:
-        print(f"❌ Forgot password error: {e}")
+        logger.error(f"Forgot password error: {e}")
         # Still return success to prevent email enumeration
         return {"message": "If the email exists, a reset link has been sent"}
 
@@ -206,8 +166,6 @@ async def forgot_password(
 async def reset_password(reset_data: PasswordReset):
     """Reset password using token"""
     try:
-        print(f"🔐 Password reset attempt with token")
-        
         success = await auth_service.reset_password(
             reset_data.token, 
             reset_data.new_password
@@ -219,13 +177,12 @@ async def reset_password(reset_data: PasswordReset):
                 detail="Invalid or expired reset token"
             )
         
-        print("✅ Password reset successful")
         return {"message": "Password reset successfully"}
     
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Password reset error: {e}")
+        logger.error(f"Password reset error: {e}")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password reset failed"
@@ -249,34 +206,28 @@ async def get_current_user_profile(current_user: dict = Depends(get_current_acti
     return current_user
 
 @router.post("/logout")
-async def logout(current_user: dict = Depends(get_current_active_user)):
-    """Logout user (client should discard tokens)"""
+async def logout(principal: CurrentPrincipal, credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Logout user, revoking the session's access and refresh tokens"""
+    payload = verify_token(credentials.credentials)
+    family = payload.get("fam") if payload else None
+    if family:
+        await revocation_list.revoke_family(
+            family, principal.id, datetime.utcnow() + REFRESH_TOKEN_LIFETIME, "logout"
+        )
     return {"message": "Logged out successfully"}
 
+@router.post("/deactivate")
+async def deactivate_account(principal: CurrentPrincipal):
+    """Deactivate the current account, revoking every session it has open"""
+    await auth_service.deactivate_user(principal.id)
+    return {"message": "Account deactivated"}
+
 # Additional endpoints for enhanced functionality
 @router.post("/register-with-tokens", response_model=Token)
-async def register_with_tokens(
-    user_data: UserRegister, 
-    background_tasks: BackgroundTasks
-):
+async def register_with_tokens(user_data: UserRegister):
     """Alternative registration that returns tokens immediately"""
-    email_service = EmailService()
-    
     try:
         result = await auth_service.register_user(user_data)
-        
-        # Send verification email in background
-        if user_data.email and user_data.provider == "EMAIL":
-            # In a real implementation, you'd need to get the verification token
-            # For now, we'll use a placeholder or modify the service to return it
-            verification_token = "need_to_implement"  # You'd extract this from the service
-            background_tasks.add_task(
-                email_service.send_verification_email,
-                user_data.email,
-                verification_token,
-                user_data.fullName
-            )
-        
         return result["tokens"]
     
     except ValueError as e:
@@ -294,13 +245,7 @@ async def debug_check_token(token: str):
         payload = verify_token(token)
         
         # Check if token exists in database
-        auth_token = await prisma.authtoken.find_first(
-            where={
-                "token": token,
-                "usedAt": None,
-                "expiresAt": {"gt": datetime.utcnow()}
-            }
-        )
+        auth_token = await auth_token_store.find(token)
         
         return {
             "token_valid": payload is not None,
@@ -314,8 +259,9 @@ async def debug_check_token(token: str):
         return {"error": str(e)}
 
 @router.post("/login-enhanced", response_model=Token)
-async def login_enhanced(login_data: UserLogin):
+async def login_enhanced(login_data: UserLogin, request: Request):
     """Enhanced login using the service method"""
+    await _throttle(login_limiter, request, login_data.email or login_data.phoneNumber)
     try:
         result = await auth_service.authenticate_user_enhanced(login_data)
         return result["tokens"]
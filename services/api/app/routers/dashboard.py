@@ -1,41 +1,63 @@
-from fastapi import APIRouter, Depends, HTTPException
-from app.core.auth import get_current_active_user
-from app.services.dashboard_service import dashboard_service
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.core.auth import CurrentPrincipal
+from app.services.activity_feed_service import activity_feed_service, MAX_PAGE_SIZE
+from app.services.dashboard_service import dashboard_service, DASHBOARD_SECTIONS
 from app.schemas.dashboard import DashboardResponse
 import logging
 
 router = APIRouter(prefix="/dashboard", tags=["dashboard"])
 logger = logging.getLogger(__name__)
 
-@router.get("/dashboard", response_model=DashboardResponse)
-async def get_user_dashboard(current_user: dict = Depends(get_current_active_user)):
+def _parse_fields(fields: Optional[str]):
+    """Split a comma separated ``fields=`` selector into section names"""
+    if fields is None:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in DASHBOARD_SECTIONS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown dashboard section(s): {', '.join(unknown)}"
+        )
+    return names
+
+@router.get("/dashboard", response_model=DashboardResponse, response_model_exclude_unset=True)
+async def get_user_dashboard(
+    principal: CurrentPrincipal,
+    fields: Optional[str] = Query(None, description="Comma separated sections to include")
+):
     """
     Get comprehensive dashboard data for the current user
-    Includes stats, activities, courses, projects, datasets, and recommendations
+    Includes stats, activities, courses, projects, datasets, and recommendations,
+    or only the sections listed in ``fields``
     """
+    sections = _parse_fields(fields)
     try:
-        logger.info(f"Fetching dashboard for user {current_user.id}")
+        logger.info(f"Fetching dashboard for user {principal.id}")
         
-        dashboard_data = await dashboard_service.get_user_dashboard(current_user.id)
+        dashboard_data = await dashboard_service.get_user_dashboard(principal.id, sections)
         
         return dashboard_data
     
     except Exception as e:
-        logger.error(f"Dashboard error for user {current_user.id}: {str(e)}")
+        logger.error(f"Dashboard error for user {principal.id}: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail="Failed to load dashboard data"
         )
 
 @router.get("/quick-stats")
-async def get_quick_stats(current_user: dict = Depends(get_current_active_user)):
+async def get_quick_stats(principal: CurrentPrincipal):
     """Get only quick statistics for dashboard widgets"""
     try:
-        dashboard_data = await dashboard_service.get_user_dashboard(current_user.id)
+        sections = await dashboard_service.get_sections(
+            principal.id, ["user_stats", "recent_activities"]
+        )
         
         return {
-            "stats": dashboard_data.user_stats,
-            "recent_activity_count": len(dashboard_data.recent_activities)
+            "stats": sections["user_stats"],
+            "recent_activity_count": len(sections["recent_activities"])
         }
     
     except Exception as e:
@@ -43,12 +65,30 @@ async def get_quick_stats(current_user: dict = Depends(get_current_active_user))
         raise HTTPException(status_code=500, detail="Failed to load quick stats")
 
 @router.get("/activities")
-async def get_recent_activities(current_user: dict = Depends(get_current_active_user)):
-    """Get only recent activities"""
+async def get_recent_activities(
+    principal: CurrentPrincipal,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE)
+):
+    """Get recent activities, one keyset page at a time"""
     try:
-        dashboard_data = await dashboard_service.get_user_dashboard(current_user.id)
-        return {"activities": dashboard_data.recent_activities}
+        page = await activity_feed_service.get_page(principal.id, cursor, limit)
+        return {"activities": page.items, "next_cursor": page.next_cursor}
     
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Activities error: {str(e)}")
-        raise HTTPException(status_code=500, detail="Failed to load activities")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Failed to load activities")
+
+@router.get("/sections/{section}")
+async def get_dashboard_section(section: str, principal: CurrentPrincipal):
+    """Get a single dashboard section, e.g. ``ongoing_courses`` or ``skill_breakdown``"""
+    if section not in DASHBOARD_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown dashboard section: {section}")
+    try:
+        return {section: await dashboard_service.get_section(principal.id, section)}
+    
+    except Exception as e:
+        logger.error(f"Dashboard section '{section}' error for user {principal.id}: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to load dashboard section")
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, status
+from app.core.prisma import prisma
+from app.core.security import verify_token
+import logging
+
+router = APIRouter(prefix="/newsletter", tags=["newsletter"])
+logger = logging.getLogger(__name__)
+
+@router.post("/unsubscribe")
+async def unsubscribe(token: str):
+    """One-click unsubscribe (RFC 8058) from the List-Unsubscribe link in digest emails.
+
+    Mail clients POST here themselves, with ``List-Unsubscribe=One-Click``
+    as the form body; the signed token in the link identifies the user.
+    """
+    payload = verify_token(token)
+    if payload is None or payload.get("type") != "unsubscribe" or payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid or expired unsubscribe link"
+        )
+
+    user_id = int(payload["sub"])
+    await prisma.user.update_many(
+        where={"id": user_id},
+        data={"subscribeNewsletter": False}
+    )
+    logger.info(f"User {user_id} unsubscribed from the newsletter")
+    return {"message": "Unsubscribed from the newsletter"}
@@ -21,6 +21,10 @@ class RecentActivity(BaseModel):
     timestamp: datetime
     metadata: Optional[Dict[str, Any]] = None
 
+class ActivityFeedPage(BaseModel):
+    items: List[RecentActivity]
+    next_cursor: Optional[str] = None  # Pass back as ``cursor`` to get the next page
+
 class CourseProgress(BaseModel):
     id: int
     title: str
@@ -49,10 +53,11 @@ class DatasetInfo(BaseModel):
     processing_status: str
 
 class DashboardResponse(BaseModel):
-    user_stats: DashboardStats
-    recent_activities: List[RecentActivity]
-    ongoing_courses: List[CourseProgress]
-    active_projects: List[ProjectStatus]
-    recent_datasets: List[DatasetInfo]
-    skill_breakdown: Dict[str, float]
-    recommendations: List[Dict[str, Any]]
\ No newline at end of file
+    # Sections left out by a ``fields=`` selector stay unset and are excluded from the response
+    user_stats: Optional[DashboardStats] = None
+    recent_activities: Optional[List[RecentActivity]] = None
+    ongoing_courses: Optional[List[CourseProgress]] = None
+    active_projects: Optional[List[ProjectStatus]] = None
+    recent_datasets: Optional[List[DatasetInfo]] = None
+    skill_breakdown: Optional[Dict[str, float]] = None
+    recommendations: Optional[List[Dict[str, Any]]] = None
\ No newline at end of file
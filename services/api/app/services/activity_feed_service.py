@@ -0,0 +1,209 @@
+import asyncio
+import base64
+import heapq
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.prisma import prisma
+from app.schemas.dashboard import ActivityFeedPage, RecentActivity
+
+MAX_PAGE_SIZE = 50
+
+# Feed position: (timestamp, source rank, row id). The feed is ordered by
+# timestamp desc, then source rank asc, then id desc, which is a total order.
+Cursor = Tuple[datetime, int, int]
+
+
+@dataclass
+class ActivitySource:
+    """One table contributing to the feed, read newest first by ``timestamp_field``"""
+    name: str
+    rank: int
+    timestamp_field: str
+    delegate: Callable[[], Any]
+    where: Callable[[int], Dict[str, Any]]
+    include: Optional[Dict[str, Any]]
+    to_activity: Callable[[Any], RecentActivity]
+
+
+def encode_cursor(cursor: Cursor) -> str:
+    timestamp, rank, row_id = cursor
+    raw = json.dumps([timestamp.isoformat(), rank, row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        timestamp, rank, row_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(rank), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+class ActivityFeedService:
+    """Unified, keyset-paginated activity feed across all pillars.
+
+    Every source is read with an indexed keyset query that starts right
+    after the cursor, and the per-source streams are k-way merged, so a deep
+    page costs the same handful of small queries as the first one.
+    """
+
+    def __init__(self):
+        self._sources = [
+            ActivitySource(
+                name="enrollment",
+                rank=0,
+                timestamp_field="completedAt",
+                delegate=lambda: prisma.enrollment,
+                where=lambda user_id: {"userId": user_id, "completedAt": {"not": None}},
+                include={"module": True},
+                to_activity=self._enrollment_activity
+            ),
+            ActivitySource(
+                name="contract",
+                rank=1,
+                timestamp_field="updatedAt",
+                delegate=lambda: prisma.contract,
+                where=lambda user_id: {"OR": [{"freelancerId": user_id}, {"clientId": user_id}]},
+                include={"project": True},
+                to_activity=self._contract_activity
+            ),
+            ActivitySource(
+                name="certificate",
+                rank=2,
+                timestamp_field="issuedAt",
+                delegate=lambda: prisma.certificate,
+                where=lambda user_id: {"userId": user_id, "deletedAt": None},
+                include={"module": True},
+                to_activity=self._certificate_activity
+            ),
+            ActivitySource(
+                name="delivery",
+                rank=3,
+                timestamp_field="deliveredAt",
+                delegate=lambda: prisma.delivery,
+                where=lambda user_id: {
+                    "deletedAt": None,
+                    "contract": {"is": {"OR": [{"freelancerId": user_id}, {"clientId": user_id}]}}
+                },
+                include={"contract": {"include": {"project": True}}},
+                to_activity=self._delivery_activity
+            ),
+            ActivitySource(
+                name="insight",
+                rank=4,
+                timestamp_field="createdAt",
+                delegate=lambda: prisma.insight,
+                where=lambda user_id: {"userId": user_id, "deletedAt": None},
+                include={"dashboard": True},
+                to_activity=self._insight_activity
+            ),
+        ]
+
+    async def get_page(self, user_id: int, cursor: Optional[str] = None, limit: int = 10) -> ActivityFeedPage:
+        """Get one page of the feed, starting after ``cursor`` when given"""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        after = decode_cursor(cursor) if cursor else None
+
+        # limit + 1 rows per source is enough to fill the page and know whether another exists
+        streams = await asyncio.gather(
+            *(self._read_source(source, user_id, after, limit + 1) for source in self._sources)
+        )
+        merged = list(heapq.merge(*streams, key=lambda entry: entry[0], reverse=True))[:limit + 1]
+
+        next_cursor = None
+        if len(merged) > limit:
+            timestamp, negated_rank, row_id = merged[limit - 1][0]
+            next_cursor = encode_cursor((timestamp, -negated_rank, row_id))
+
+        return ActivityFeedPage(
+            items=[activity for _, activity in merged[:limit]],
+            next_cursor=next_cursor
+        )
+
+    async def _read_source(
+        self, source: ActivitySource, user_id: int, after: Optional[Cursor], take: int
+    ) -> List[Tuple[Tuple[datetime, int, int], RecentActivity]]:
+        where = source.where(user_id)
+        if after is not None:
+            where = {"AND": [where, self._keyset_filter(source, after)]}
+
+        rows = await source.delegate().find_many(
+            where=where,
+            include=source.include,
+            order=[{source.timestamp_field: "desc"}, {"id": "desc"}],
+            take=take
+        )
+        # Merge key sorts descending: newest first, then lowest rank, then highest id
+        return [
+            ((getattr(row, source.timestamp_field), -source.rank, row.id), source.to_activity(row))
+            for row in rows
+        ]
+
+    def _keyset_filter(self, source: ActivitySource, after: Cursor) -> Dict[str, Any]:
+        """Rows of ``source`` that sort strictly after the cursor position"""
+        timestamp, rank, row_id = after
+        field = source.timestamp_field
+        if source.rank > rank:
+            return {field: {"lte": timestamp}}
+        if source.rank < rank:
+            return {field: {"lt": timestamp}}
+        return {"OR": [{field: {"lt": timestamp}}, {field: timestamp, "id": {"lt": row_id}}]}
+
+    def _enrollment_activity(self, enrollment: Any) -> RecentActivity:
+        return RecentActivity(
+            id=enrollment.id,
+            type="course_completed",
+            title=enrollment.module.title if enrollment.module else "Course",
+            description=f"Completed {enrollment.module.title}" if enrollment.module else "Completed course",
+            timestamp=enrollment.completedAt,
+            metadata={"source": "enrollment", "module_id": enrollment.moduleId}
+        )
+
+    def _contract_activity(self, contract: Any) -> RecentActivity:
+        activity_type = "project_started" if contract.status == "ACTIVE" else "project_updated"
+        return RecentActivity(
+            id=contract.id,
+            type=activity_type,
+            title=contract.project.title if contract.project else "Project",
+            description=f"Project status: {contract.status}",
+            timestamp=contract.updatedAt,
+            metadata={"source": "contract", "project_id": contract.projectId, "status": contract.status}
+        )
+
+    def _certificate_activity(self, certificate: Any) -> RecentActivity:
+        title = certificate.module.title if certificate.module else "Certificate"
+        return RecentActivity(
+            id=certificate.id,
+            type="certification_earned",
+            title=title,
+            description=f"Earned a certificate for {title}",
+            timestamp=certificate.issuedAt,
+            metadata={"source": "certificate", "module_id": certificate.moduleId, "file_url": certificate.fileUrl}
+        )
+
+    def _delivery_activity(self, delivery: Any) -> RecentActivity:
+        project = delivery.contract.project if delivery.contract else None
+        return RecentActivity(
+            id=delivery.id,
+            type="delivery_submitted",
+            title=project.title if project else "Project",
+            description=delivery.description or "Delivery submitted",
+            timestamp=delivery.deliveredAt,
+            metadata={"source": "delivery", "contract_id": delivery.contractId}
+        )
+
+    def _insight_activity(self, insight: Any) -> RecentActivity:
+        return RecentActivity(
+            id=insight.id,
+            type="insight_created",
+            title=insight.dashboard.title if insight.dashboard else "Insight",
+            description=insight.content[:140],
+            timestamp=insight.createdAt,
+            metadata={"source": "insight", "dashboard_id": insight.dashboardId}
+        )
+
+# Singleton instance
+activity_feed_service = ActivityFeedService()
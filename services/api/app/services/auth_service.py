@@ -1,32 +1,53 @@
+import hashlib
+import logging
+import secrets
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, Tuple
-from fastapi import HTTPException, status, BackgroundTasks
+from app.core.auth import load_identity
+from app.core.config import settings
+from app.core.password_hasher import password_hasher
+from app.core.principal_cache import principal_cache
+from app.core.revocation import revocation_list
 from app.core.security import (
-    verify_password, 
-    get_password_hash, 
-    create_access_token_for_user,
-    create_refresh_token_for_user,
+    REFRESH_TOKEN_LIFETIME,
+    create_token_pair,
     create_access_token,
-    create_refresh_token,
     verify_token
 )
 from app.core.prisma import prisma
-from app.schemas.auth import UserRegister, UserLogin, AuthProvider, UserRole
-from app.services.email_service import email_service
+from app.generated.prisma.errors import UniqueViolationError
+from app.schemas.auth import UserRegister, UserLogin, AuthProvider
+from app.services.auth_token_store import auth_token_store
+from app.services.email_outbox import email_outbox
+from app.services.login_activity import login_activity
+from app.services.registration_filter import registration_filter
+
+logger = logging.getLogger(__name__)
+
+VERIFICATION_TOKEN_TTL = timedelta(hours=settings.VERIFICATION_TOKEN_EXPIRE_HOURS)
+RESET_TOKEN_TTL = timedelta(hours=settings.RESET_TOKEN_EXPIRE_HOURS)
+
+# Columns the login path needs; avoids loading the full user and its relations
+_CREDENTIAL_COLUMNS = '"id", "email", "phoneNumber", "fullName", "role", "emailVerified", "passwordHash", "deletedAt"'
 
 
 class AuthService:
     
     async def create_user(self, user_data: UserRegister) -> Tuple[Dict[str, Any], str]:
-        """Create a new user and return user data with verification token"""
-        print(f"🔧 AUTH_SERVICE: Creating user with email: {user_data.email}")
+        """Create a new user and return user data with verification token.
+
+        The user, its verification token and the queued verification email
+        are written by one nested create, which the engine runs as a single
+        transaction: either all exist or none does.
+        """
+        logger.debug(f"Creating user (email: {bool(user_data.email)}, phone: {bool(user_data.phoneNumber)})")
         
         try:
-            # Check if user already exists
+            # Check if user already exists; the filter rules out most new identities without a query
             existing_filters = []
-            if user_data.email:
+            if user_data.email and registration_filter.email_maybe_taken(user_data.email):
                 existing_filters.append({"email": user_data.email})
-            if user_data.phoneNumber:
+            if user_data.phoneNumber and registration_filter.phone_maybe_taken(user_data.phoneNumber):
                 existing_filters.append({"phoneNumber": user_data.phoneNumber})
             
             if existing_filters:
@@ -37,51 +58,45 @@ class AuthService:
                     if existing_user.phoneNumber == user_data.phoneNumber:
                         raise ValueError("Phone number already registered")
             
-            print("✅ AUTH_SERVICE: No existing user found")
+            password_hash = await password_hasher.hash(user_data.password)
             
-            # Hash the password
-            password_hash = get_password_hash(user_data.password)
-            print(f"🔧 AUTH_SERVICE: Password hash created: {password_hash[:20]}...")
+            # Opaque single-use token; it is only ever looked up by its hash
+            verification_token = secrets.token_urlsafe(32)
             
-            # Create user with proper field mapping
-            print("🔧 AUTH_SERVICE: Creating user in database...")
-            user_data_dict = {
-                "fullName": user_data.fullName,
-                "email": user_data.email,
-                "phoneNumber": user_data.phoneNumber,
-                "passwordHash": password_hash,
-                "provider": user_data.provider,
-                "acceptedTerms": user_data.acceptedTerms,
-                "subscribeNewsletter": user_data.subscribeNewsletter,
-                "role": user_data.role
-            }
-            print(f"🔧 AUTH_SERVICE: User data to create: {user_data_dict}")
+            outbound_emails = []
+            if user_data.email and user_data.provider == AuthProvider.EMAIL:
+                outbound_emails.append(email_outbox.message_data(
+                    "verification",
+                    user_data.email,
+                    {"token": verification_token, "name": user_data.fullName}
+                ))
             
-            user = await prisma.user.create(data=user_data_dict)
+            try:
+                user = await prisma.user.create(
+                    data={
+                        "fullName": user_data.fullName,
+                        "email": user_data.email,
+                        "phoneNumber": user_data.phoneNumber,
+                        "passwordHash": password_hash,
+                        "provider": user_data.provider,
+                        "acceptedTerms": user_data.acceptedTerms,
+                        "subscribeNewsletter": user_data.subscribeNewsletter,
+                        "role": user_data.role,
+                        "authTokens": {
+                            "create": [
+                                auth_token_store.token_data(verification_token, "verification", VERIFICATION_TOKEN_TTL)
+                            ]
+                        },
+                        "outboundEmails": {"create": outbound_emails}
+                    }
+                )
+            except UniqueViolationError:
+                # Lost a race with a concurrent registration of the same identity
+                raise ValueError("Email or phone number already registered")
+            registration_filter.add(user.email, user.phoneNumber)
             
-            print(f"✅ AUTH_SERVICE: User created successfully with ID: {user.id}")
+            logger.info(f"Registered user {user.id}")
             
-            # Create verification token
-            print("🔧 AUTH_SERVICE: Creating verification token...")
-            from app.core.security import create_access_token
-            verification_token = create_access_token({"sub": str(user.id)})
-            
-            print(f"🔧 AUTH_SERVICE: Created verification token for user {user.id}")
-            print(f"🔧 AUTH_SERVICE: Token type: {type(verification_token)}")
-            print(f"🔧 AUTH_SERVICE: Token preview: {verification_token[:50]}...")
-            
-            # Store verification token
-            await prisma.authtoken.create(
-                data={
-                    "userId": user.id,
-                    "token": verification_token,
-                    "type": "verification",  # Make sure this matches
-                    "expiresAt": datetime.utcnow() + timedelta(days=7)
-                }
-            )
-            print("✅ AUTH_SERVICE: Auth token stored successfully")
-            
-            # Convert user to dict
             user_dict = {
                 "id": user.id,
                 "email": user.email,
@@ -90,123 +105,79 @@ class AuthService:
                 "emailVerified": user.emailVerified,
                 "createdAt": user.createdAt.isoformat() if user.createdAt else None
             }
-            
-            print("✅ AUTH_SERVICE: User creation completed successfully")
             return user_dict, verification_token
             
+        except ValueError as e:
+            raise ValueError(f"Failed to create user: {str(e)}")
         except Exception as e:
-            print(f"❌ AUTH_SERVICE: Failed to create user: {str(e)}")
-            import traceback
-            print(f"🔴 AUTH_SERVICE TRACEBACK:\n{traceback.format_exc()}")
+            logger.exception("Failed to create user")
             raise ValueError(f"Failed to create user: {str(e)}")
 
     async def authenticate_user(self, email: Optional[str] = None, phone_number: Optional[str] = None, password: str = None) -> Optional[Dict[str, Any]]:
-        """Authenticate user with email/phone and password"""
+        """Authenticate user with email/phone and password.
+
+        Reads only the credential columns, and records the login through the
+        write-behind queue instead of updating the user row inline.
+        """
         if not email and not phone_number:
             raise ValueError("Either email or phone number is required")
         
         # Find user by email or phone
-        where_filters = []
+        conditions, args = [], []
         if email:
-            where_filters.append({"email": email})
+            args.append(email)
+            conditions.append(f'"email" = ${len(args)}')
         if phone_number:
-            where_filters.append({"phoneNumber": phone_number})
+            args.append(phone_number)
+            conditions.append(f'"phoneNumber" = ${len(args)}')
         
-        user = await prisma.user.find_first(
-            where={"OR": where_filters},
-            include={
-                "ownedOrganization": True,
-                "primaryOrganization": True
-            }
-        )
+        # With both identifiers, the email match wins if they belong to different users
+        order = ' ORDER BY ("email" = $1) IS TRUE DESC' if email and phone_number else ""
         
-        print(f"🔧 AUTH_SERVICE: User found: {user.id if user else 'None'}")
-        print(f"🔧 AUTH_SERVICE: User password hash: {user.passwordHash if user else 'None'}")
-        
-        if not user:
-            return None
+        user = await prisma.query_first(
+            f'SELECT {_CREDENTIAL_COLUMNS} FROM "User" WHERE {" OR ".join(conditions)}{order} LIMIT 1',
+            *args
+        )
         
-        if not user.passwordHash:
-            print("❌ AUTH_SERVICE: No password hash found for user")
+        if not user or not user["passwordHash"]:
             return None
         
         # Verify password
-        password_valid = verify_password(password, user.passwordHash)
-        print(f"🔧 AUTH_SERVICE: Password verification result: {password_valid}")
-        
+        password_valid = await password_hasher.verify(password, user.pop("passwordHash"))
         if not password_valid:
             return None
         
-        if user.deletedAt:
+        if user["deletedAt"]:
             raise ValueError("Account is deactivated")
         
-        # Update last login
-        await prisma.user.update(
-            where={"id": user.id},
-            data={"updatedAt": datetime.utcnow()}
-        )
-        
-        return user.dict()
+        login_activity.record(user["id"])
+        return user
     
     async def verify_email(self, token: str) -> bool:
         """Verify user email using token"""
-        print(f"🔧 AUTH_SERVICE: Verifying email with token: {token[:20]}...")
-        
         try:
-            payload = verify_token(token)
-            print(f"🔧 AUTH_SERVICE: Token payload: {payload}")
-            
-            if not payload:
-                print("❌ AUTH_SERVICE: Token verification failed - no payload")
-                return False
-            
-            user_id = payload.get("sub")
-            if not user_id:
-                print("❌ AUTH_SERVICE: No user ID in token payload")
-                return False
-
-            print(f"🔧 AUTH_SERVICE: Looking for user ID: {user_id}")
-            
-            # Verify token exists and is valid
-            auth_token = await prisma.authtoken.find_first(
-                where={
-                    "token": token,
-                    "type": "verification", 
-                    "usedAt": None,
-                    "expiresAt": {"gt": datetime.utcnow()}
-                }
-            )
-            
-            print(f"🔧 AUTH_SERVICE: Auth token found: {auth_token is not None}")
-            
-            if not auth_token:
-                print("❌ AUTH_SERVICE: No valid auth token found in database")
+            # Verify token exists and is valid, and mark it used in the same statement
+            user_id = await auth_token_store.consume(token, "verification")
+            if user_id is None:
+                logger.debug("Email verification with an unknown, used or expired token")
                 return False
             
             # Update user email verification status
             await prisma.user.update(
-                where={"id": int(user_id)},
+                where={"id": user_id},
                 data={"emailVerified": True}
             )
+            await principal_cache.invalidate_user(user_id)
             
-            print(f"✅ AUTH_SERVICE: Email verified for user ID: {user_id}")
-            
-            # Mark token as used
-            await prisma.authtoken.update(
-                where={"id": auth_token.id},
-                data={"usedAt": datetime.utcnow()}
-            )
-            
+            logger.info(f"Email verified for user {user_id}")
             return True
             
-        except Exception as e:
-            print(f"❌ AUTH_SERVICE: Email verification error: {str(e)}")
-            import traceback
-            print(f"🔴 TRACEBACK: {traceback.format_exc()}")
+        except Exception:
+            logger.exception("Email verification failed")
             return False
     
     async def create_password_reset_token(self, email: str) -> Optional[str]:
-        """Create password reset token for user"""
+        """Create password reset token for user and queue the reset email"""
         user = await prisma.user.find_unique(where={"email": email})
         if not user:
             return None
@@ -214,15 +185,17 @@ class AuthService:
         # Create reset token
         reset_token = create_access_token({"sub": str(user.id)})
         
-        # Store reset token
-        await prisma.authtoken.create(
-            data={
-                "userId": user.id,
-                "token": reset_token,
-                "type": "password_reset",
-                "expiresAt": datetime.utcnow() + timedelta(hours=24)
-            }
-        )
+        # Store the token and queue its email in one transactional batch
+        async with prisma.batch_() as batch:
+            batch.authtoken.create(
+                data={"userId": user.id, **auth_token_store.token_data(reset_token, "password_reset", RESET_TOKEN_TTL)}
+            )
+            batch.emailoutbox.create(
+                data={
+                    "userId": user.id,
+                    **email_outbox.message_data("password_reset", email, {"token": reset_token, "name": user.fullName})
+                }
+            )
         
         return reset_token
     
@@ -236,30 +209,36 @@ class AuthService:
         if not user_id:
             return False
         
-        # Verify token exists and is valid
-        auth_token = await prisma.authtoken.find_first(
-            where={
-                "token": token,
-                "type": "password_reset",
-                "usedAt": None,
-                "expiresAt": {"gt": datetime.utcnow()}
-            }
-        )
+        # Hash first so a hashing failure does not burn the token
+        password_hash = await password_hasher.hash(new_password)
         
-        if not auth_token:
+        # Verify token exists and is valid, and mark it used in the same statement
+        token_user_id = await auth_token_store.consume(token, "password_reset")
+        if token_user_id is None or token_user_id != int(user_id):
             return False
         
-        # Update password
-        await prisma.user.update(
-            where={"id": int(user_id)},
-            data={"passwordHash": get_password_hash(new_password)}
-        )
+        user = await prisma.user.find_unique(where={"id": token_user_id})
+        if not user:
+            return False
         
-        # Mark token as used
-        await prisma.authtoken.update(
-            where={"id": auth_token.id},
-            data={"usedAt": datetime.utcnow()}
-        )
+        # Update the password and tell the owner, in one transactional batch
+        async with prisma.batch_() as batch:
+            batch.user.update(
+                where={"id": user.id},
+                data={"passwordHash": password_hash}
+            )
+            if user.email:
+                batch.notification.create(
+                    data=email_outbox.notification_data(
+                        user.id,
+                        user.email,
+                        "security",
+                        "Your Podacium password was changed",
+                        "The password for your account was just reset. If this wasn't you, "
+                        "reset it again right away and contact support."
+                    )
+                )
+        await principal_cache.invalidate_user(user.id)
         
         return True
     
@@ -269,22 +248,13 @@ class AuthService:
         return user.dict() if user else None
     
     # New methods for the enhanced approach
-    async def register_user(self, user_data: UserRegister, background_tasks: BackgroundTasks) -> Dict[str, Any]:
+    async def register_user(self, user_data: UserRegister) -> Dict[str, Any]:
         """Enhanced register method that returns tokens quickly"""
-        user, verification_token = await self.create_user(user_data)
-        
-        # Send verification email in background
-        if user_data.email:
-            background_tasks.add_task(
-                email_service.send_verification_email, 
-                user_data.email, 
-                verification_token,
-                user_data.fullName
-            )
+        # The verification email is queued in the outbox by create_user
+        user, _ = await self.create_user(user_data)
         
         # Create tokens for immediate login
-        access_token = create_access_token_for_user(user["id"])
-        refresh_token = create_refresh_token_for_user(user["id"])
+        access_token, refresh_token = create_token_pair(user["id"])
         
         return {
             "user": user,
@@ -308,8 +278,7 @@ class AuthService:
             raise ValueError("Invalid credentials")
         
         # Create tokens
-        access_token = create_access_token_for_user(user["id"])
-        refresh_token = create_refresh_token_for_user(user["id"])
+        access_token, refresh_token = create_token_pair(user["id"])
         
         return {
             "user": user,
@@ -332,14 +301,32 @@ class AuthService:
         if not user_id:
             raise ValueError("Invalid token payload")
         
-        # Verify user still exists
-        user = await prisma.user.find_unique(where={"id": int(user_id)})
-        if not user or user.deletedAt:
+        # Tokens issued before rotation was introduced have no jti/fam; their digest stands in for both
+        jti = payload.get("jti") or hashlib.sha256(refresh_token.encode()).hexdigest()[:32]
+        family = payload.get("fam") or jti
+        if revocation_list.is_family_revoked(family) or revocation_list.is_user_revoked(int(user_id), payload.get("iat")):
+            raise ValueError("Refresh token revoked")
+
+        # Verify user still exists, from the principal cache when possible
+        identity = await load_identity(int(user_id))
+        if identity is None or identity[1]:
             raise ValueError("User not found")
-        
-        # Create new tokens
-        new_access_token = create_access_token_for_user(user_id)
-        new_refresh_token = create_refresh_token_for_user(user_id)
+
+        # Rotate: the presented token is revoked as the new pair is issued. A
+        # token that was already rotated is being replayed, so the whole
+        # family (including the legitimate holder's newer tokens) is revoked.
+        expires_at = datetime.utcfromtimestamp(payload["exp"]) if payload.get("exp") else datetime.utcnow() + REFRESH_TOKEN_LIFETIME
+        if revocation_list.is_token_revoked(jti) or not await revocation_list.revoke_token(
+            jti, int(user_id), expires_at, "rotated"
+        ):
+            await revocation_list.revoke_family(
+                family, int(user_id), datetime.utcnow() + REFRESH_TOKEN_LIFETIME, "reuse"
+            )
+            revocation_list.record_reuse()
+            logger.warning(f"Refresh token reuse detected for user {user_id}; session revoked")
+            raise ValueError("Refresh token reuse detected")
+
+        new_access_token, new_refresh_token = create_token_pair(int(user_id), family)
 
         return {
             "access_token": new_access_token,
@@ -348,6 +335,16 @@ class AuthService:
             "expires_in": 1800
         }
     
+    async def deactivate_user(self, user_id: int):
+        """Soft-delete a user and revoke every session they have open, on all instances"""
+        await prisma.user.update(
+            where={"id": user_id},
+            data={"deletedAt": datetime.utcnow()}
+        )
+        await revocation_list.revoke_user(user_id, datetime.utcnow() + REFRESH_TOKEN_LIFETIME, "deactivated")
+        await principal_cache.invalidate_user(user_id)
+        logger.info(f"Deactivated user {user_id}")
+    
     async def request_password_reset(self, email: str):
         """Request password reset (enhanced method)"""
         return await self.create_password_reset_token(email)
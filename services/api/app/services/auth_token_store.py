@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.prisma import prisma
+
+logger = logging.getLogger(__name__)
+
+# Token types issued by the API; the sweeper walks each through the (type, expiresAt) index
+TOKEN_TYPES = ("verification", "password_reset")
+
+_UTC_NOW = "(now() AT TIME ZONE 'UTC')"
+
+
+def hash_token(token: str) -> str:
+    """Fixed-length digest stored in place of the token"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AuthTokenStore:
+    """Single-use email tokens (verification, password reset).
+
+    Only a SHA-256 digest of each token is stored and looked up through its
+    unique index, so lookups stay flat as the table grows. Consuming a token
+    also moves its expiry to now, which lets a batched background sweeper
+    remove expired and used rows through the ``(type, expiresAt)`` index.
+    """
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.swept = 0
+        self.last_sweep_at: Optional[datetime] = None
+
+    def token_data(self, token: str, token_type: str, ttl: timedelta) -> Dict[str, Any]:
+        """Row data for a token, also usable as a nested create under its user"""
+        return {
+            "tokenHash": hash_token(token),
+            "type": token_type,
+            "expiresAt": datetime.utcnow() + ttl
+        }
+
+    async def issue(self, user_id: int, token: str, token_type: str, ttl: timedelta):
+        await prisma.authtoken.create(
+            data={"userId": user_id, **self.token_data(token, token_type, ttl)}
+        )
+
+    async def consume(self, token: str, token_type: str) -> Optional[int]:
+        """Atomically mark a valid, unused token as used; returns its user id"""
+        row = await prisma.query_first(
+            f'UPDATE "AuthToken" SET "usedAt" = {_UTC_NOW}, "expiresAt" = {_UTC_NOW} '
+            f'WHERE "tokenHash" = $1 AND "type" = $2 AND "usedAt" IS NULL AND "expiresAt" > {_UTC_NOW} '
+            'RETURNING "userId"',
+            hash_token(token),
+            token_type
+        )
+        return row["userId"] if row else None
+
+    async def find(self, token: str) -> Optional[Any]:
+        return await prisma.authtoken.find_unique(where={"tokenHash": hash_token(token)})
+
+    async def sweep(self) -> int:
+        """Delete expired (including used) tokens in batches"""
+        deleted = 0
+        for token_type in TOKEN_TYPES:
+            while True:
+                count = await prisma.execute_raw(
+                    'DELETE FROM "AuthToken" WHERE "id" IN ('
+                    f'SELECT "id" FROM "AuthToken" WHERE "type" = $1 AND "expiresAt" <= {_UTC_NOW} LIMIT $2)',
+                    token_type,
+                    self.batch_size
+                )
+                deleted += count
+                if count < self.batch_size:
+                    break
+        self.swept += deleted
+        self.last_sweep_at = datetime.utcnow()
+        if deleted:
+            logger.info(f"Swept {deleted} expired auth tokens")
+        return deleted
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "swept": self.swept,
+            "last_sweep_at": self.last_sweep_at.isoformat() if self.last_sweep_at else None,
+        }
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Auth token sweep failed: {e}")
+            await asyncio.sleep(self.interval)
+
+
+# Singleton instance
+auth_token_store = AuthTokenStore(
+    settings.AUTH_TOKEN_SWEEP_SECONDS,
+    settings.AUTH_TOKEN_SWEEP_BATCH_SIZE
+)
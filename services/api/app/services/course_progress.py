@@ -0,0 +1,57 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+from app.core.prisma import prisma
+
+
+@dataclass
+class ModuleProgress:
+    total_lessons: int
+    completed_lessons: int
+    next_lesson: Optional[str]
+
+    @property
+    def progress(self) -> float:
+        return (self.completed_lessons / self.total_lessons * 100) if self.total_lessons > 0 else 0
+
+
+# One grouped pass over every lesson of the requested modules. The LEFT JOIN
+# keeps lessons without a progress row in the total, and the next lesson is
+# the lowest-ordered lesson the user started but has not completed yet.
+_MODULE_PROGRESS_QUERY = """
+SELECT
+    l."moduleId" AS "moduleId",
+    COUNT(l."id")::int AS "totalLessons",
+    (COUNT(lp."id") FILTER (WHERE lp."isCompleted"))::int AS "completedLessons",
+    (ARRAY_AGG(l."title" ORDER BY l."order") FILTER (WHERE lp."id" IS NOT NULL AND NOT lp."isCompleted"))[1] AS "nextLesson"
+FROM "Lesson" l
+LEFT JOIN "LessonProgress" lp
+    ON lp."lessonId" = l."id" AND lp."userId" = $1
+WHERE l."moduleId" = ANY($2::int[])
+GROUP BY l."moduleId"
+"""
+
+
+class CourseProgressLoader:
+
+    async def load(self, user_id: int, module_ids: Iterable[int]) -> Dict[int, ModuleProgress]:
+        """Load lesson progress for all of a user's modules in a single query"""
+        module_ids = sorted(set(module_ids))
+        if not module_ids:
+            return {}
+
+        rows = await prisma.query_raw(_MODULE_PROGRESS_QUERY, user_id, module_ids)
+
+        progress = {
+            module_id: ModuleProgress(total_lessons=0, completed_lessons=0, next_lesson=None)
+            for module_id in module_ids
+        }
+        for row in rows:
+            progress[row["moduleId"]] = ModuleProgress(
+                total_lessons=row["totalLessons"],
+                completed_lessons=row["completedLessons"],
+                next_lesson=row["nextLesson"]
+            )
+        return progress
+
+# Singleton instance
+course_progress_loader = CourseProgressLoader()
@@ -0,0 +1,71 @@
+import json
+import logging
+from typing import Any, Awaitable, Callable, Dict
+from pydantic import TypeAdapter
+from app.core.cache import CacheBackend, create_cache_backend
+from app.core.config import settings
+from app.schemas.dashboard import DashboardResponse
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardCache:
+    """Per-user, per-section cache of dashboard responses.
+
+    Sections are cached individually so that the full dashboard, the
+    ``fields=`` selector and the section endpoints all share entries.
+
+    The cache is TTL-only: the tables behind the dashboard are written
+    outside this API, so nothing here can invalidate on write, and a
+    section may be up to ``DASHBOARD_CACHE_TTL_SECONDS`` old, including
+    after the user's own changes.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._adapters: Dict[str, TypeAdapter] = {
+            name: TypeAdapter(field.annotation)
+            for name, field in DashboardResponse.model_fields.items()
+        }
+
+    def _key(self, user_id: int, section: str) -> str:
+        return f"dashboard:{user_id}:{section}"
+
+    async def get_or_build(self, user_id: int, section: str, build: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached section or build and store it; failed builds are not cached"""
+        key = self._key(user_id, section)
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Dashboard cache read failed for {key}: {e}")
+            cached = None
+        if cached is not None:
+            return self._decode(section, cached)
+
+        value = await build()
+        try:
+            await self.backend.set(key, self._encode(section, value), self.ttl)
+        except Exception as e:
+            logger.warning(f"Dashboard cache write failed for {key}: {e}")
+        return value
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.backend.stats(), "ttl_seconds": self.ttl}
+
+    def _encode(self, section: str, value: Any) -> Any:
+        if not self.backend.shared:
+            return value
+        return json.dumps(self._adapters[section].dump_python(value, mode="json"))
+
+    def _decode(self, section: str, cached: Any) -> Any:
+        if not self.backend.shared:
+            return cached
+        return self._adapters[section].validate_python(json.loads(cached))
+
+
+# Singleton instance
+dashboard_cache = DashboardCache(
+    create_cache_backend(settings.DASHBOARD_CACHE_MAX_ENTRIES),
+    settings.DASHBOARD_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,41 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List
+from app.core.prisma import prisma
+from app.services.skill_vector_service import skill_vector_service
+
+
+class DashboardContext:
+    """Request-scoped snapshot of the rows shared by several dashboard sections.
+
+    Each table is loaded at most once per request, the first time a section
+    asks for it; sections running concurrently await the same in-flight load
+    and derive their own views from it in memory.
+    """
+
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self._loads: Dict[str, "asyncio.Future[Any]"] = {}
+
+    async def _once(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if key not in self._loads:
+            self._loads[key] = asyncio.ensure_future(loader())
+        # Shield the shared load so one section timing out does not cancel it for the others
+        return await asyncio.shield(self._loads[key])
+
+    async def enrollments(self) -> List[Any]:
+        """All of the user's enrollments with their module"""
+        return await self._once(
+            "enrollments",
+            lambda: prisma.enrollment.find_many(
+                where={"userId": self.user_id},
+                include={"module": True}
+            )
+        )
+
+    async def skill_vector(self) -> Dict[str, float]:
+        """The user's raw skill weights"""
+        return await self._once("skill_vector", lambda: skill_vector_service.get_vector(self.user_id))
+
+    async def open_enrollments(self) -> List[Any]:
+        """Enrollments that are not completed yet"""
+        return [e for e in await self.enrollments() if not e.completedAt]
@@ -1,209 +1,133 @@
+import asyncio
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from functools import partial
+from typing import Dict, Iterable, List, Any, Optional
+from app.core.concurrency import Section, gather_sections
+from app.core.config import settings
 from app.core.prisma import prisma
+from app.services.activity_feed_service import activity_feed_service
+from app.services.course_progress import course_progress_loader
+from app.services.dashboard_cache import dashboard_cache
+from app.services.dashboard_context import DashboardContext
+from app.services.dashboard_summary_service import dashboard_summary_service
+from app.services.recommendation_service import recommendation_service
+from app.services.skill_vector_service import normalize
 from app.schemas.dashboard import (
     DashboardStats, RecentActivity, CourseProgress, 
     ProjectStatus, DatasetInfo, DashboardResponse
 )
 
+# Sections of DashboardResponse that can be requested individually
+DASHBOARD_SECTIONS = (
+    "user_stats",
+    "recent_activities",
+    "ongoing_courses",
+    "active_projects",
+    "recent_datasets",
+    "skill_breakdown",
+    "recommendations",
+)
+
 class DashboardService:
     
-    async def get_user_dashboard(self, user_id: int) -> DashboardResponse:
-        """Get comprehensive dashboard data for a user"""
-        
-        # Get all data in parallel for better performance
-        stats = await self._get_user_stats(user_id)
-        activities = await self._get_recent_activities(user_id)
-        courses = await self._get_ongoing_courses(user_id)
-        projects = await self._get_active_projects(user_id)
-        datasets = await self._get_recent_datasets(user_id)
-        skills = await self._get_skill_breakdown(user_id)
-        recommendations = await self._get_recommendations(user_id)
-        
-        return DashboardResponse(
-            user_stats=stats,
-            recent_activities=activities,
-            ongoing_courses=courses,
-            active_projects=projects,
-            recent_datasets=datasets,
-            skill_breakdown=skills,
-            recommendations=recommendations
-        )
+    def __init__(self):
+        # Section name -> (builder, empty value used when the builder fails)
+        self._sections = {
+            "user_stats": (self._get_user_stats, self._empty_stats),
+            "recent_activities": (self._get_recent_activities, list),
+            "ongoing_courses": (self._get_ongoing_courses, list),
+            "active_projects": (self._get_active_projects, list),
+            "recent_datasets": (self._get_recent_datasets, list),
+            "skill_breakdown": (self._get_skill_breakdown, dict),
+            "recommendations": (self._get_recommendations, list),
+        }
     
-    async def _get_user_stats(self, user_id: int) -> DashboardStats:
-        """Calculate user statistics"""
-        
-        # Course statistics
-        enrollments = await prisma.enrollment.find_many(
-            where={"userId": user_id},
-            include={"module": True}
-        )
-        
-        total_courses = len(enrollments)
-        completed_courses = len([e for e in enrollments if e.completedAt])
-        
-        # Project statistics
-        contracts_as_freelancer = await prisma.contract.find_many(
-            where={"freelancerId": user_id}
-        )
-        contracts_as_client = await prisma.contract.find_many(
-            where={"clientId": user_id}
-        )
-        all_contracts = contracts_as_freelancer + contracts_as_client
-        
-        active_projects = len([c for c in all_contracts if c.status == "ACTIVE"])
-        completed_projects = len([c for c in all_contracts if c.status == "COMPLETED"])
-        
-        # Dataset statistics
-        datasets_count = await prisma.dataset.count(where={"userId": user_id})
-        
-        # Certification statistics
-        certifications_count = await prisma.certificate.count(where={"userId": user_id})
-        
-        # Earnings calculation (from freelancer contracts)
-        total_earnings = sum(
-            [contract.amountCents or 0 for contract in contracts_as_freelancer 
-             if contract.status == "COMPLETED"]
-        ) / 100  # Convert cents to currency units
-        
-        # Skill level calculation
-        skill_level = self._calculate_skill_level(user_id, enrollments, all_contracts)
-        
-        return DashboardStats(
-            total_courses=total_courses,
-            completed_courses=completed_courses,
-            active_projects=active_projects,
-            completed_projects=completed_projects,
-            datasets_count=datasets_count,
-            certifications_count=certifications_count,
-            total_earnings=total_earnings,
-            skill_level=skill_level
-        )
+    async def get_user_dashboard(self, user_id: int, fields: Optional[Iterable[str]] = None) -> DashboardResponse:
+        """Get dashboard data for a user, limited to ``fields`` when given"""
+        sections = await self.get_sections(user_id, fields)
+        return DashboardResponse(**sections)
     
-    async def _get_recent_activities(self, user_id: int) -> List[RecentActivity]:
-        """Get user's recent activities across all pillars"""
-        activities = []
-        
-        # Recent course completions
-        recent_completions = await prisma.enrollment.find_many(
-            where={
-                "userId": user_id,
-                "completedAt": {"not": None}
+    async def get_section(self, user_id: int, section: str) -> Any:
+        """Get a single dashboard section for a user"""
+        sections = await self.get_sections(user_id, [section])
+        return sections[section]
+    
+    async def get_sections(self, user_id: int, fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Build only the requested sections; all of them when ``fields`` is None"""
+        names = list(dict.fromkeys(fields)) if fields is not None else list(DASHBOARD_SECTIONS)
+        unknown = [name for name in names if name not in self._sections]
+        if unknown:
+            raise ValueError(f"Unknown dashboard section(s): {', '.join(unknown)}")
+        
+        ctx = DashboardContext(user_id)
+        
+        # Get requested sections in parallel, served from the cache when fresh;
+        # a failing section degrades to an empty value and is not cached
+        return await gather_sections(
+            {
+                name: Section(
+                    partial(dashboard_cache.get_or_build, user_id, name, partial(self._sections[name][0], ctx)),
+                    self._sections[name][1]
+                )
+                for name in names
             },
-            include={"module": True},
-            take=5,
-            order={"completedAt": "desc"}
+            timeout=settings.DASHBOARD_SECTION_TIMEOUT_SECONDS
         )
+    
+    async def _get_user_stats(self, ctx: DashboardContext) -> DashboardStats:
+        """Read user statistics from the materialized summary row"""
+        summary = await dashboard_summary_service.get_summary(ctx.user_id)
         
-        for completion in recent_completions:
-            activities.append(RecentActivity(
-                id=completion.id,
-                type="course_completed",
-                title=completion.module.title if completion.module else "Course",
-                description=f"Completed {completion.module.title}" if completion.module else "Completed course",
-                timestamp=completion.completedAt or datetime.utcnow(),
-                metadata={"module_id": completion.moduleId}
-            ))
-        
-        # Recent project activities
-        recent_contracts = await prisma.contract.find_many(
-            where={
-                "OR": [
-                    {"freelancerId": user_id},
-                    {"clientId": user_id}
-                ]
-            },
-            include={"project": True},
-            take=5,
-            order={"updatedAt": "desc"}
+        return DashboardStats(
+            total_courses=summary.totalCourses,
+            completed_courses=summary.completedCourses,
+            active_projects=summary.activeProjects,
+            completed_projects=summary.completedProjects,
+            datasets_count=summary.datasetsCount,
+            certifications_count=summary.certificationsCount,
+            total_earnings=summary.totalEarningsCents / 100,  # Convert cents to currency units
+            skill_level=self._calculate_skill_level(summary.totalCourses, summary.totalContracts)
         )
-        
-        for contract in recent_contracts:
-            activity_type = "project_started" if contract.status == "ACTIVE" else "project_updated"
-            activities.append(RecentActivity(
-                id=contract.id,
-                type=activity_type,
-                title=contract.project.title if contract.project else "Project",
-                description=f"Project status: {contract.status}",
-                timestamp=contract.updatedAt,
-                metadata={"project_id": contract.projectId, "status": contract.status}
-            ))
-        
-        # Sort all activities by timestamp and return top 10
-        activities.sort(key=lambda x: x.timestamp, reverse=True)
-        return activities[:10]
     
-    async def _get_ongoing_courses(self, user_id: int) -> List[CourseProgress]:
+    async def _get_recent_activities(self, ctx: DashboardContext) -> List[RecentActivity]:
+        """Get user's recent activities across all pillars (first page of the activity feed)"""
+        page = await activity_feed_service.get_page(ctx.user_id, limit=10)
+        return page.items
+    
+    async def _get_ongoing_courses(self, ctx: DashboardContext) -> List[CourseProgress]:
         """Get user's ongoing courses with progress"""
-        enrollments = await prisma.enrollment.find_many(
-            where={
-                "userId": user_id,
-                "completedAt": None
-            },
-            include={
-                "module": {
-                    "include": {
-                        "lessons": True,
-                        "pathLinks": {
-                            "include": {"path": True}
-                        }
-                    }
-                }
-            }
+        enrollments = [enrollment for enrollment in await ctx.open_enrollments() if enrollment.module]
+        
+        # Lesson counts and next lessons for every module in one round trip
+        module_progress = await course_progress_loader.load(
+            ctx.user_id, [enrollment.module.id for enrollment in enrollments]
         )
         
         courses = []
         for enrollment in enrollments:
-            if not enrollment.module:
-                continue
-                
-            # Calculate progress
-            total_lessons = len(enrollment.module.lessons)
-            completed_lessons = await prisma.lessonprogress.count(
-                where={
-                    "userId": user_id,
-                    "lessonId": {"in": [lesson.id for lesson in enrollment.module.lessons]},
-                    "isCompleted": True
-                }
-            )
-            
-            progress = (completed_lessons / total_lessons * 100) if total_lessons > 0 else 0
-            
-            # Find next lesson
-            next_lesson = None
-            if progress < 100:
-                next_lesson_progress = await prisma.lessonprogress.find_first(
-                    where={
-                        "userId": user_id,
-                        "lesson": {"moduleId": enrollment.moduleId},
-                        "isCompleted": False
-                    },
-                    include={"lesson": True},
-                    order={"lesson": {"order": "asc"}}
-                )
-                if next_lesson_progress and next_lesson_progress.lesson:
-                    next_lesson = next_lesson_progress.lesson.title
+            lesson_progress = module_progress[enrollment.module.id]
+            progress = lesson_progress.progress
             
             courses.append(CourseProgress(
                 id=enrollment.module.id,
                 title=enrollment.module.title,
                 progress=progress,
-                module_count=total_lessons,
-                completed_modules=completed_lessons,
-                next_lesson=next_lesson,
+                module_count=lesson_progress.total_lessons,
+                completed_modules=lesson_progress.completed_lessons,
+                next_lesson=lesson_progress.next_lesson,
                 estimated_completion=self._estimate_completion_date(progress),
                 thumbnail_url=enrollment.module.thumbnailUrl
             ))
         
         return courses
     
-    async def _get_active_projects(self, user_id: int) -> List[ProjectStatus]:
+    async def _get_active_projects(self, ctx: DashboardContext) -> List[ProjectStatus]:
         """Get user's active projects"""
         contracts = await prisma.contract.find_many(
             where={
                 "OR": [
-                    {"freelancerId": user_id},
-                    {"clientId": user_id}
+                    {"freelancerId": ctx.user_id},
+                    {"clientId": ctx.user_id}
                 ],
                 "status": "ACTIVE"
             },
@@ -242,10 +166,10 @@ class DashboardService:
         
         return projects
     
-    async def _get_recent_datasets(self, user_id: int) -> List[DatasetInfo]:
+    async def _get_recent_datasets(self, ctx: DashboardContext) -> List[DatasetInfo]:
         """Get user's recent datasets"""
         datasets = await prisma.dataset.find_many(
-            where={"userId": user_id},
+            where={"userId": ctx.user_id},
             take=5,
             order={"updatedAt": "desc"}
         )
@@ -263,64 +187,35 @@ class DashboardService:
         
         return dataset_info
     
-    async def _get_skill_breakdown(self, user_id: int) -> Dict[str, float]:
-        """Calculate user's skill breakdown"""
-        # Get user skills
-        user_skills = await prisma.userskill.find_many(where={"userId": user_id})
-        
-        # Get skills from completed courses
-        completed_enrollments = await prisma.enrollment.find_many(
-            where={
-                "userId": user_id,
-                "completedAt": {"not": None}
-            },
-            include={"module": True}
+    async def _get_skill_breakdown(self, ctx: DashboardContext) -> Dict[str, float]:
+        """Calculate user's skill breakdown from the precomputed skill vector"""
+        return normalize(await ctx.skill_vector())
+    
+    async def _get_recommendations(self, ctx: DashboardContext) -> List[Dict[str, Any]]:
+        """Rank modules and open projects against the user's skill vector"""
+        vector, enrollments = await asyncio.gather(ctx.skill_vector(), ctx.enrollments())
+        return recommendation_service.recommend(
+            ctx.user_id,
+            vector,
+            exclude_module_ids=[enrollment.moduleId for enrollment in enrollments]
         )
-        
-        skill_levels = {}
-        
-        # Add explicit user skills
-        for skill in user_skills:
-            skill_levels[skill.name] = skill_levels.get(skill.name, 0) + 30
-        
-        # Add skills from completed courses
-        for enrollment in completed_enrollments:
-            if enrollment.module and enrollment.module.skills:
-                for skill in enrollment.module.skills:
-                    skill_levels[skill] = skill_levels.get(skill, 0) + 20
-        
-        # Normalize skill levels (0-100)
-        if skill_levels:
-            max_level = max(skill_levels.values())
-            skill_levels = {skill: (level / max_level * 100) for skill, level in skill_levels.items()}
-        
-        return skill_levels
     
-    async def _get_recommendations(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get AI-powered recommendations for the user"""
-        # This would integrate with your AI service for Algerian context
-        recommendations = [
-            {
-                "type": "course",
-                "title": "Data Analysis for Algerian SMEs",
-                "description": "Learn to analyze local business data",
-                "reason": "Based on your completed Python courses",
-                "action_url": "/courses/data-analysis-algerian-smes"
-            },
-            {
-                "type": "project",
-                "title": "Sales Dashboard for Local Retailer",
-                "description": "Help a local business visualize their sales data",
-                "reason": "Matches your BI skills and location",
-                "action_url": "/projects/sales-dashboard-retail"
-            }
-        ]
-        
-        return recommendations
+    def _empty_stats(self) -> DashboardStats:
+        """Zeroed statistics used when the stats section is unavailable"""
+        return DashboardStats(
+            total_courses=0,
+            completed_courses=0,
+            active_projects=0,
+            completed_projects=0,
+            datasets_count=0,
+            certifications_count=0,
+            total_earnings=0,
+            skill_level="Beginner"
+        )
     
-    def _calculate_skill_level(self, user_id: int, enrollments: List, contracts: List) -> str:
+    def _calculate_skill_level(self, enrollment_count: int, contract_count: int) -> str:
         """Calculate overall skill level based on activities"""
-        total_activities = len(enrollments) + len(contracts)
+        total_activities = enrollment_count + contract_count
         
         if total_activities == 0:
             return "Beginner"
@@ -0,0 +1,152 @@
+"""Materialized per-user dashboard totals.
+
+``UserDashboardSummary`` holds one row per user with the counters the
+dashboard stats widget needs. Enrollments, contracts, datasets and
+certificates are written outside this API, so the row is not maintained
+incrementally: it is rebuilt from the source tables on first access and
+whenever it is older than ``DASHBOARD_SUMMARY_MAX_AGE_SECONDS``. All rows
+can be rebuilt ahead of time (e.g. after a bulk import) with:
+
+    python -m app.services.dashboard_summary_service            # all users
+    python -m app.services.dashboard_summary_service 12 34      # given users
+"""
+import asyncio
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+from app.core.config import settings
+from app.core.prisma import prisma
+
+logger = logging.getLogger(__name__)
+
+# Contracts carry no amount of their own; a contract pays what the freelancer's
+# proposal on its project asked for. Summed as bigint, which cents outgrow int4 in
+_EARNINGS_SQL = """
+SELECT COALESCE(SUM(p."amountCents"), 0)::bigint AS "earnedCents"
+FROM "Contract" AS c
+LEFT JOIN LATERAL (
+    SELECT "amountCents" FROM "Proposal"
+    WHERE "projectId" = c."projectId" AND "freelancerId" = c."freelancerId" AND "deletedAt" IS NULL
+    ORDER BY ("status" = 'ACCEPTED') DESC, "createdAt" DESC
+    LIMIT 1
+) AS p ON true
+WHERE c."freelancerId" = $1 AND c."status" = 'COMPLETED'
+"""
+
+
+class DashboardSummaryService:
+
+    def __init__(self, max_age: timedelta):
+        self.max_age = max_age
+
+    async def get_summary(self, user_id: int) -> Any:
+        """Read the user's summary row, rebuilding it when missing or older than ``max_age``"""
+        summary = await prisma.userdashboardsummary.find_first(
+            where={"userId": user_id, "rebuiltAt": {"gte": datetime.utcnow() - self.max_age}}
+        )
+        if summary is None:
+            summary = await self.rebuild_user(user_id)
+        return summary
+
+    async def compute(self, user_id: int) -> Dict[str, int]:
+        """Compute the summary counters from the source tables with engine-side aggregates"""
+        (
+            total_courses,
+            completed_courses,
+            freelancer_groups,
+            client_groups,
+            datasets_count,
+            certifications_count,
+            earnings
+        ) = await asyncio.gather(
+            prisma.enrollment.count(where={"userId": user_id}),
+            prisma.enrollment.count(where={"userId": user_id, "completedAt": {"not": None}}),
+            prisma.contract.group_by(
+                ["status"],
+                where={"freelancerId": user_id},
+                count=True
+            ),
+            prisma.contract.group_by(
+                ["status"],
+                where={"clientId": user_id},
+                count=True
+            ),
+            prisma.dataset.count(where={"userId": user_id}),
+            prisma.certificate.count(where={"userId": user_id}),
+            prisma.query_first(_EARNINGS_SQL, user_id)
+        )
+
+        # Contracts as freelancer and as client
+        contracts_by_status: Dict[str, int] = {}
+        for group in freelancer_groups + client_groups:
+            contracts_by_status[group["status"]] = (
+                contracts_by_status.get(group["status"], 0) + group["_count"]["_all"]
+            )
+
+        return {
+            "totalCourses": total_courses,
+            "completedCourses": completed_courses,
+            "totalContracts": sum(contracts_by_status.values()),
+            "activeProjects": contracts_by_status.get("ACTIVE", 0),
+            "completedProjects": contracts_by_status.get("COMPLETED", 0),
+            "datasetsCount": datasets_count,
+            "certificationsCount": certifications_count,
+            # Earnings come from completed freelancer contracts
+            "totalEarningsCents": int(earnings["earnedCents"]) if earnings else 0,
+        }
+
+    async def rebuild_user(self, user_id: int) -> Any:
+        """Recompute and persist a user's summary row"""
+        data = await self.compute(user_id)
+        data["rebuiltAt"] = datetime.utcnow()
+        return await prisma.userdashboardsummary.upsert(
+            where={"userId": user_id},
+            data={
+                "create": {"userId": user_id, **data},
+                "update": data,
+            }
+        )
+
+    async def rebuild_all(self, batch_size: int = 500) -> int:
+        """Backfill summaries for every user, walking user ids in keyset pages"""
+        rebuilt = 0
+        last_id = 0
+        while True:
+            users = await prisma.user.find_many(
+                where={"id": {"gt": last_id}},
+                order={"id": "asc"},
+                take=batch_size
+            )
+            if not users:
+                break
+            for user in users:
+                await self.rebuild_user(user.id)
+            rebuilt += len(users)
+            last_id = users[-1].id
+            logger.info(f"Rebuilt dashboard summaries for {rebuilt} users (last id {last_id})")
+        return rebuilt
+
+
+# Singleton instance
+dashboard_summary_service = DashboardSummaryService(
+    timedelta(seconds=settings.DASHBOARD_SUMMARY_MAX_AGE_SECONDS)
+)
+
+
+async def _main(user_ids: List[int]):
+    await prisma.connect()
+    try:
+        if user_ids:
+            for user_id in user_ids:
+                await dashboard_summary_service.rebuild_user(user_id)
+            logger.info(f"Rebuilt dashboard summaries for {len(user_ids)} users")
+        else:
+            await dashboard_summary_service.rebuild_all()
+    finally:
+        await prisma.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main([int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,156 @@
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.prisma import prisma
+from app.generated.prisma import Json
+
+logger = logging.getLogger(__name__)
+
+_UTC_NOW = "(now() AT TIME ZONE 'UTC')"
+
+_CLAIM_SQL = f"""
+UPDATE "EmailOutbox"
+SET "attempts" = "attempts" + 1,
+    "lockedUntil" = {_UTC_NOW} + $2::int * interval '1 second'
+WHERE "id" IN (
+    SELECT "id" FROM "EmailOutbox"
+    WHERE "status" = 'pending'
+      AND "nextAttemptAt" <= {_UTC_NOW}
+      AND ("lockedUntil" IS NULL OR "lockedUntil" <= {_UTC_NOW})
+    ORDER BY "nextAttemptAt", "id"
+    LIMIT $1
+    FOR UPDATE SKIP LOCKED
+)
+RETURNING "id", "kind", "toEmail", "payload", "attempts", "notificationId"
+"""
+
+# Payloads may hold single-use tokens, so they are cleared once the message is out
+_MARK_SENT_SQL = f"""
+WITH sent AS (
+    UPDATE "EmailOutbox"
+    SET "status" = 'sent', "sentAt" = {_UTC_NOW}, "lockedUntil" = NULL, "lastError" = NULL, "payload" = '{{}}'
+    WHERE "id" = ANY($1::int[])
+    RETURNING "notificationId"
+)
+UPDATE "Notification" AS n
+SET "emailSent" = true, "emailSentAt" = {_UTC_NOW}
+FROM sent
+WHERE n."id" = sent."notificationId"
+"""
+
+# Rows out of attempts will never be sent, so their payloads are cleared too
+_MARK_FAILED_SQL = f"""
+UPDATE "EmailOutbox" AS o
+SET "status" = CASE WHEN o."attempts" >= $3 THEN 'failed' ELSE 'pending' END,
+    "nextAttemptAt" = {_UTC_NOW} + LEAST($4::int * power(2, o."attempts" - 1), $5::int) * interval '1 second',
+    "lockedUntil" = NULL,
+    "lastError" = v."error",
+    "payload" = CASE WHEN o."attempts" >= $3 THEN '{{}}' ELSE o."payload" END
+FROM unnest($1::int[], $2::text[]) AS v("id", "error")
+WHERE o."id" = v."id"
+"""
+
+_COUNTS_SQL = """
+SELECT
+    count(*) FILTER (WHERE "status" = 'pending') AS "pending",
+    count(*) FILTER (WHERE "status" = 'pending' AND "nextAttemptAt" <= (now() AT TIME ZONE 'UTC')) AS "due",
+    count(*) FILTER (WHERE "status" = 'failed') AS "failed"
+FROM "EmailOutbox"
+WHERE "status" IN ('pending', 'failed')
+"""
+
+
+class EmailOutbox:
+    """Durable queue of outbound email in the ``EmailOutbox`` table.
+
+    Producers insert a row (``kind`` plus the JSON ``payload`` its template
+    needs) in the same write as the data it belongs to. The email worker
+    claims due rows in batches with ``FOR UPDATE SKIP LOCKED`` and a lease,
+    so several workers can run side by side and a crashed worker's rows are
+    picked up again once the lease runs out. Failed sends are retried with
+    exponential backoff until ``max_attempts``.
+    """
+
+    def __init__(self, lease_seconds: int, max_attempts: int, backoff_seconds: int, max_backoff_seconds: int):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+
+    def message_data(
+        self,
+        kind: str,
+        to_email: str,
+        payload: Dict[str, Any],
+        notification_id: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """Row data for a message, also usable as a nested create under its user"""
+        data = {"kind": kind, "toEmail": to_email, "payload": Json(payload)}
+        if notification_id is not None:
+            data["notificationId"] = notification_id
+        return data
+
+    def notification_data(
+        self,
+        user_id: int,
+        to_email: str,
+        notification_type: str,
+        title: str,
+        body: str
+    ) -> Dict[str, Any]:
+        """A Notification and its email, created together; sending it marks the notification emailed"""
+        return {
+            "userId": user_id,
+            "type": notification_type,
+            "title": title,
+            "body": body,
+            "emails": {
+                "create": [
+                    {"userId": user_id, **self.message_data("notification", to_email, {"subject": title, "text": body})}
+                ]
+            }
+        }
+
+    async def claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Lease up to ``limit`` due messages to this worker"""
+        rows = await prisma.query_raw(_CLAIM_SQL, limit, self.lease_seconds)
+        for row in rows:
+            if isinstance(row["payload"], str):
+                row["payload"] = json.loads(row["payload"])
+        return rows
+
+    async def mark_sent(self, ids: List[int]):
+        """Complete messages and flag their notifications as emailed, in one statement"""
+        if ids:
+            await prisma.execute_raw(_MARK_SENT_SQL, ids)
+
+    async def mark_failed(self, failures: List[Tuple[int, str]]):
+        """Schedule retries with backoff; messages out of attempts become 'failed' and lose their payload"""
+        if failures:
+            await prisma.execute_raw(
+                _MARK_FAILED_SQL,
+                [message_id for message_id, _ in failures],
+                [error[:1000] for _, error in failures],
+                self.max_attempts,
+                self.backoff_seconds,
+                self.max_backoff_seconds
+            )
+
+    async def stats(self) -> Dict[str, Any]:
+        """Queue depth from the table, so it also covers messages no worker is draining"""
+        row = await prisma.query_first(_COUNTS_SQL)
+        return {
+            "pending": int(row["pending"]),
+            "due": int(row["due"]),
+            "failed": int(row["failed"]),
+        }
+
+
+# Singleton instance
+email_outbox = EmailOutbox(
+    settings.EMAIL_OUTBOX_LEASE_SECONDS,
+    settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    settings.EMAIL_OUTBOX_BACKOFF_SECONDS,
+    settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS
+)
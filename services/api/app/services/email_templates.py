@@ -0,0 +1,47 @@
+import logging
+from pathlib import Path
+from typing import Any, Dict, Tuple
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+from markupsafe import Markup
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+
+
+class EmailTemplates:
+    """Jinja2 email templates, compiled once.
+
+    Every template in ``app/templates/email`` is compiled to Python when the
+    instance is created and kept for the life of the process (no reload
+    checks). The stylesheet is read once and shared by all layouts as a
+    pre-escaped global, so rendering only interpolates the per-recipient
+    slots. HTML templates autoescape their variables; ``.txt`` ones do not.
+    """
+
+    def __init__(self, directory: Path = TEMPLATE_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(str(directory)),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,
+            trim_blocks=True,
+            undefined=StrictUndefined,
+            keep_trailing_newline=True
+        )
+        self.env.globals["css"] = Markup((directory / "email.css").read_text(encoding="utf-8"))
+        self._templates: Dict[str, Template] = {
+            name: self.env.get_template(name)
+            for name in self.env.list_templates(extensions=["html", "txt"])
+        }
+        logger.debug(f"Compiled {len(self._templates)} email templates")
+
+    def render(self, template: str, **context: Any) -> Tuple[str, str]:
+        """Render the HTML and plain-text parts of ``template``"""
+        return (
+            self._templates[f"{template}.html"].render(context),
+            self._templates[f"{template}.txt"].render(context)
+        )
+
+
+# Singleton instance
+email_templates = EmailTemplates()
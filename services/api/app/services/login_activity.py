@@ -0,0 +1,103 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.prisma import prisma
+from app.core.principal_cache import principal_cache
+
+logger = logging.getLogger(__name__)
+
+_FLUSH_SQL = """
+UPDATE "User" AS u
+SET "lastLoginAt" = v."lastLoginAt"::timestamp(3),
+    "loginCount" = u."loginCount" + v."logins"
+FROM unnest($1::int[], $2::text[], $3::int[]) AS v("id", "lastLoginAt", "logins")
+WHERE u."id" = v."id"
+"""
+
+
+class LoginActivityWriter:
+    """Write-behind queue for ``lastLoginAt`` / ``loginCount``.
+
+    Logins are recorded in memory and coalesced per user; every
+    ``LOGIN_ACTIVITY_FLUSH_SECONDS`` the pending users are written with a
+    single batched UPDATE. A failed flush is merged back and retried on the
+    next one.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._pending: Dict[int, Tuple[datetime, int]] = {}
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.failures = 0
+
+    def record(self, user_id: int, at: Optional[datetime] = None):
+        """Queue a successful login; never blocks"""
+        self._merge(user_id, at or datetime.utcnow(), 1)
+
+    async def flush(self) -> int:
+        """Write every pending login in one statement"""
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        user_ids = list(batch)
+        try:
+            await prisma.execute_raw(
+                _FLUSH_SQL,
+                user_ids,
+                [batch[user_id][0].isoformat() for user_id in user_ids],
+                [batch[user_id][1] for user_id in user_ids]
+            )
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Login activity flush failed for {len(batch)} users: {e}")
+            for user_id, (last_login, logins) in batch.items():
+                self._merge(user_id, last_login, logins)
+            return 0
+
+        self.flushes += 1
+        self.rows_written += len(user_ids)
+        await principal_cache.invalidate_user(*user_ids)
+        return len(user_ids)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Stop the background loop and write what is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failures": self.failures,
+        }
+
+    def _merge(self, user_id: int, at: datetime, logins: int):
+        if user_id in self._pending:
+            last_login, pending = self._pending[user_id]
+            self._pending[user_id] = (max(last_login, at), pending + logins)
+        else:
+            self._pending[user_id] = (at, logins)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+
+
+# Singleton instance
+login_activity = LoginActivityWriter(settings.LOGIN_ACTIVITY_FLUSH_SECONDS)
@@ -0,0 +1,242 @@
+"""Skill-based recommendations of modules and open projects.
+
+Candidates are served from an in-memory ``RecommendationIndex`` that maps
+each skill to the positions of the items teaching or requiring it. Scoring
+a user only touches the postings of the skills in their vector, so the
+cost is proportional to the number of candidates, not the catalog. The
+index is rebuilt in the background every
+``RECOMMENDATION_INDEX_REFRESH_SECONDS`` and swapped in atomically.
+"""
+import asyncio
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import numpy as np
+from app.core.config import settings
+from app.core.prisma import prisma
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = 1000
+
+
+@dataclass
+class Candidate:
+    """A recommendable module or project"""
+    type: str
+    id: int
+    title: str
+    description: str
+    action_url: str
+    skills: List[str]
+    owner_id: Optional[int] = None
+
+
+@dataclass
+class RecommendationIndex:
+    """Immutable snapshot of the catalog, inverted by skill"""
+    items: List[Candidate]
+    postings: Dict[str, np.ndarray]
+    norms: np.ndarray
+    module_positions: Dict[int, int]
+    owned_positions: Dict[int, List[int]]
+    featured: List[int]
+    built_at: datetime
+
+    @classmethod
+    def build(cls, items: List[Candidate], featured_module_ids: Set[int]) -> "RecommendationIndex":
+        positions: Dict[str, List[int]] = {}
+        owned: Dict[int, List[int]] = {}
+        for position, item in enumerate(items):
+            for skill in item.skills:
+                positions.setdefault(skill, []).append(position)
+            if item.owner_id is not None:
+                owned.setdefault(item.owner_id, []).append(position)
+        module_positions = {item.id: p for p, item in enumerate(items) if item.type == "course"}
+        return cls(
+            items=items,
+            postings={skill: np.asarray(p, dtype=np.int32) for skill, p in positions.items()},
+            # Dampen items that list many skills so they do not win on breadth alone
+            norms=np.asarray([math.sqrt(len(item.skills)) or 1.0 for item in items], dtype=np.float32),
+            module_positions=module_positions,
+            owned_positions=owned,
+            featured=[module_positions[m] for m in sorted(featured_module_ids) if m in module_positions],
+            built_at=datetime.utcnow()
+        )
+
+
+class RecommendationService:
+
+    def __init__(self):
+        self._index: Optional[RecommendationIndex] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.calls = 0
+        self.over_budget = 0
+        self.last_build_seconds: Optional[float] = None
+
+    def recommend(
+        self,
+        user_id: int,
+        vector: Dict[str, float],
+        exclude_module_ids: Iterable[int] = (),
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Rank indexed candidates by weighted skill overlap with ``vector``"""
+        index = self._index
+        if index is None or not index.items:
+            return []
+        started = time.perf_counter()
+
+        # Gather the postings of the user's skills; only these items can score
+        hits = [(index.postings[skill], weight) for skill, weight in vector.items() if skill in index.postings]
+        excluded = [index.module_positions[m] for m in exclude_module_ids if m in index.module_positions]
+        excluded += index.owned_positions.get(user_id, [])
+
+        picked: List[int] = []
+        if hits:
+            positions = np.concatenate([postings for postings, _ in hits])
+            weights = np.concatenate([np.full(len(postings), weight, dtype=np.float32) for postings, weight in hits])
+            candidates, inverse = np.unique(positions, return_inverse=True)
+            scores = np.bincount(inverse, weights=weights) / index.norms[candidates]
+
+            # Never suggest modules the user is enrolled in or projects they own
+            keep = ~np.isin(candidates, excluded) & (scores > 0)
+            candidates, scores = candidates[keep], scores[keep]
+            if len(candidates) > limit:
+                top = np.argpartition(-scores, limit - 1)[:limit]
+                candidates, scores = candidates[top], scores[top]
+            picked = [int(p) for p in candidates[np.argsort(-scores, kind="stable")]]
+
+        # Top up with featured modules for users with thin or no skill vectors
+        skipped = set(excluded)
+        for position in index.featured:
+            if len(picked) >= limit:
+                break
+            if position not in picked and position not in skipped:
+                picked.append(position)
+
+        recommendations = [self._to_recommendation(index.items[p], vector) for p in picked]
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.calls += 1
+        if elapsed_ms > settings.RECOMMENDATION_LATENCY_BUDGET_MS:
+            self.over_budget += 1
+            logger.warning(
+                f"Recommendations for user {user_id} took {elapsed_ms:.1f}ms "
+                f"(budget {settings.RECOMMENDATION_LATENCY_BUDGET_MS}ms)"
+            )
+        return recommendations
+
+    async def refresh(self) -> RecommendationIndex:
+        """Rebuild the index from the catalog and swap it in"""
+        started = time.perf_counter()
+        modules = await self._load_all(
+            lambda: prisma.module, {"deletedAt": None}
+        )
+        projects = await self._load_all(
+            lambda: prisma.project, {"deletedAt": None, "status": "OPEN"}
+        )
+
+        items = [
+            Candidate(
+                type="course",
+                id=module.id,
+                title=module.title,
+                description=module.description or "",
+                action_url=f"/courses/{module.slug}",
+                skills=sorted(set(module.skills or []))
+            )
+            for module in modules
+        ] + [
+            Candidate(
+                type="project",
+                id=project.id,
+                title=project.title,
+                description=project.description or "",
+                action_url=f"/projects/{project.slug}",
+                skills=sorted(set(project.skills or [])),
+                owner_id=project.ownerId
+            )
+            for project in projects
+        ]
+        featured = {module.id for module in modules if module.featured}
+
+        self._index = RecommendationIndex.build(items, featured)
+        self.last_build_seconds = time.perf_counter() - started
+        logger.info(
+            f"Recommendation index rebuilt: {len(modules)} modules, {len(projects)} projects, "
+            f"{len(self._index.postings)} skills in {self.last_build_seconds:.2f}s"
+        )
+        return self._index
+
+    async def start(self):
+        """Build the index now and keep rebuilding it in the background"""
+        try:
+            await self.refresh()
+        except Exception as e:
+            logger.error(f"Initial recommendation index build failed: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        return {
+            "items": len(index.items) if index else 0,
+            "skills": len(index.postings) if index else 0,
+            "built_at": index.built_at.isoformat() if index else None,
+            "last_build_seconds": self.last_build_seconds,
+            "calls": self.calls,
+            "over_budget": self.over_budget,
+        }
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(settings.RECOMMENDATION_INDEX_REFRESH_SECONDS)
+            try:
+                await self.refresh()
+            except Exception as e:
+                # Keep serving the previous index
+                logger.error(f"Recommendation index rebuild failed: {e}")
+
+    async def _load_all(self, delegate: Callable[[], Any], where: Dict[str, Any]) -> List[Any]:
+        """Read every matching row in keyset pages"""
+        rows: List[Any] = []
+        last_id = 0
+        while True:
+            page = await delegate().find_many(
+                where={**where, "id": {"gt": last_id}},
+                order={"id": "asc"},
+                take=_PAGE_SIZE
+            )
+            rows.extend(page)
+            if len(page) < _PAGE_SIZE:
+                return rows
+            last_id = page[-1].id
+
+    def _to_recommendation(self, item: Candidate, vector: Dict[str, float]) -> Dict[str, Any]:
+        matched = sorted((s for s in item.skills if s in vector), key=lambda s: -vector[s])[:3]
+        reason = f"Matches your skills: {', '.join(matched)}" if matched else "Featured course"
+        return {
+            "type": item.type,
+            "id": item.id,
+            "title": item.title,
+            "description": item.description,
+            "reason": reason,
+            "action_url": item.action_url,
+        }
+
+
+# Singleton instance
+recommendation_service = RecommendationService()
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.bloom import BloomFilter
+from app.core.config import settings
+from app.core.prisma import prisma
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = 5000
+# Ids are allocated before commit, so a sync re-reads this many ids below the last one seen
+_SYNC_OVERLAP_IDS = 1000
+
+
+def _normalize(value: str) -> str:
+    return value.strip().lower()
+
+
+class RegistrationFilter:
+    """Bloom filters over registered emails and phone numbers.
+
+    A "not taken" answer is definite and lets registration skip the
+    duplicate lookup; "maybe taken" falls through to the database and its
+    unique indexes. Until the filters are warmed every answer is "maybe".
+
+    Users created by other workers or instances, or inserted directly, are
+    pulled in by id every ``REGISTRATION_FILTER_SYNC_SECONDS``, so a
+    "not taken" answer is at most that stale. The filters are rebuilt from
+    scratch every ``REGISTRATION_FILTER_REBUILD_SECONDS`` to pick up
+    anything else (e.g. changed emails).
+    """
+
+    def __init__(self, min_capacity: int, error_rate: float, sync_interval: float, rebuild_interval: float):
+        self.min_capacity = min_capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_every = max(1, int(rebuild_interval // sync_interval))
+        self._emails: Optional[BloomFilter] = None
+        self._phones: Optional[BloomFilter] = None
+        self._last_id = 0
+        self._warming: Optional["asyncio.Task[None]"] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+        # Identities added while a warm-up is reading users, replayed into the new filters
+        self._added_while_warming: List[Tuple[Optional[str], Optional[str]]] = []
+        self.definite_negatives = 0
+        self.fallthroughs = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._emails is not None
+
+    def email_maybe_taken(self, email: str) -> bool:
+        return self._check(self._emails, email)
+
+    def phone_maybe_taken(self, phone_number: str) -> bool:
+        return self._check(self._phones, phone_number)
+
+    def add(self, email: Optional[str], phone_number: Optional[str]):
+        """Record a newly created user"""
+        if self._warming is not None:
+            self._added_while_warming.append((email, phone_number))
+        if self.ready:
+            self._insert(self._emails, self._phones, email, phone_number)
+            if self._emails.saturated or self._phones.saturated:
+                logger.info("Registration filter is over capacity, rebuilding")
+                self._rewarm()
+
+    def start(self):
+        """Warm the filters in the background, then keep them in sync"""
+        self._rewarm()
+        if self._task is None:
+            self._task = asyncio.create_task(self._sync_loop())
+
+    async def stop(self):
+        for task in (self._task, self._warming):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = None
+
+    async def sync(self):
+        """Add users created since the last pass, by this or any other instance"""
+        if not self.ready or self._warming is not None:
+            return
+        since_id = max(0, self._last_id - _SYNC_OVERLAP_IDS)
+        self._last_id = max(self._last_id, await self._pull(since_id, self._emails, self._phones))
+
+    async def warm(self):
+        """Build fresh filters from every user, walking ids in keyset pages"""
+        try:
+            total = await prisma.user.count()
+            capacity = max(self.min_capacity, total * 2)
+            emails = BloomFilter(capacity, self.error_rate)
+            phones = BloomFilter(capacity, self.error_rate)
+            last_id = await self._pull(0, emails, phones)
+
+            for email, phone_number in self._added_while_warming:
+                self._insert(emails, phones, email, phone_number)
+            self._emails, self._phones, self._last_id = emails, phones, last_id
+            logger.info(f"Registration filter warmed with {emails.count} users (capacity {capacity})")
+        except Exception as e:
+            logger.error(f"Registration filter warm-up failed: {e}")
+        finally:
+            self._added_while_warming = []
+            self._warming = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "last_id": self._last_id,
+            "definite_negatives": self.definite_negatives,
+            "fallthroughs": self.fallthroughs,
+            "emails": self._emails.stats() if self._emails else None,
+            "phones": self._phones.stats() if self._phones else None,
+        }
+
+    def _rewarm(self):
+        if self._warming is None:
+            self._warming = asyncio.create_task(self.warm())
+
+    async def _pull(self, since_id: int, emails: BloomFilter, phones: BloomFilter) -> int:
+        """Insert users with ids above ``since_id``; returns the last id read"""
+        while True:
+            rows = await prisma.query_raw(
+                'SELECT "id", "email", "phoneNumber" FROM "User" WHERE "id" > $1 ORDER BY "id" LIMIT $2',
+                since_id,
+                _PAGE_SIZE
+            )
+            for row in rows:
+                self._insert(emails, phones, row["email"], row["phoneNumber"])
+            if rows:
+                since_id = rows[-1]["id"]
+            if len(rows) < _PAGE_SIZE:
+                return since_id
+
+    async def _sync_loop(self):
+        iteration = 0
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            iteration += 1
+            try:
+                if iteration % self.rebuild_every == 0:
+                    self._rewarm()
+                else:
+                    await self.sync()
+            except Exception as e:
+                logger.error(f"Registration filter sync failed: {e}")
+
+    def _check(self, bloom: Optional[BloomFilter], value: str) -> bool:
+        if bloom is not None and not bloom.might_contain(_normalize(value)):
+            self.definite_negatives += 1
+            return False
+        self.fallthroughs += 1
+        return True
+
+    def _insert(self, emails: BloomFilter, phones: BloomFilter, email: Optional[str], phone_number: Optional[str]):
+        if email:
+            emails.add(_normalize(email))
+        if phone_number:
+            phones.add(_normalize(phone_number))
+
+
+# Singleton instance
+registration_filter = RegistrationFilter(
+    settings.REGISTRATION_FILTER_MIN_CAPACITY,
+    settings.REGISTRATION_FILTER_ERROR_RATE,
+    settings.REGISTRATION_FILTER_SYNC_SECONDS,
+    settings.REGISTRATION_FILTER_REBUILD_SECONDS
+)
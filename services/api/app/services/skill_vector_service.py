@@ -0,0 +1,179 @@
+"""Precomputed per-user skill vectors.
+
+``UserSkillWeight`` holds one row per (user, skill) with the raw weight the
+dashboard skill breakdown and recommendations are derived from: every
+explicit ``UserSkill`` counts ``EXPLICIT_SKILL_WEIGHT`` and every skill
+taught by a completed module counts ``COMPLETED_MODULE_SKILL_WEIGHT``.
+
+Skills and enrollments are written outside this API, so vectors are
+rebuilt lazily: ``UserSkillVector`` records when each user's vector was
+last built (empty vectors included), and reads recompute the users whose
+vector is missing or older than ``SKILL_VECTOR_MAX_AGE_SECONDS`` in one
+batch. Vectors are normalized at read time. All users can be rebuilt
+ahead of time with:
+
+    python -m app.services.skill_vector_service            # all users
+    python -m app.services.skill_vector_service 12 34      # given users
+"""
+import asyncio
+import logging
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+from app.core.config import settings
+from app.core.prisma import prisma
+
+logger = logging.getLogger(__name__)
+
+EXPLICIT_SKILL_WEIGHT = 30.0
+COMPLETED_MODULE_SKILL_WEIGHT = 20.0
+
+
+def normalize(vector: Dict[str, float]) -> Dict[str, float]:
+    """Scale a vector so its strongest skill is 100"""
+    if not vector:
+        return {}
+    max_weight = max(vector.values())
+    return {skill: weight / max_weight * 100 for skill, weight in vector.items()}
+
+
+class SkillVectorService:
+
+    def __init__(self, max_age: timedelta):
+        self.max_age = max_age
+        self.rebuilt = 0
+
+    async def get_vector(self, user_id: int) -> Dict[str, float]:
+        """Raw skill weights for a user"""
+        return (await self.get_vectors([user_id])).get(user_id, {})
+
+    async def get_vectors(self, user_ids: Iterable[int]) -> Dict[int, Dict[str, float]]:
+        """Raw skill weights for several users, rebuilding missing or stale vectors in one batch"""
+        user_ids = list(set(user_ids))
+        if not user_ids:
+            return {}
+        built, rows = await asyncio.gather(
+            prisma.userskillvector.find_many(
+                where={"userId": {"in": user_ids}, "builtAt": {"gte": datetime.utcnow() - self.max_age}}
+            ),
+            prisma.userskillweight.find_many(
+                where={"userId": {"in": user_ids}, "weight": {"gt": 0}}
+            )
+        )
+        fresh = {row.userId for row in built}
+        vectors: Dict[int, Dict[str, float]] = {}
+        for row in rows:
+            if row.userId in fresh:
+                vectors.setdefault(row.userId, {})[row.skill] = row.weight
+
+        stale = [user_id for user_id in user_ids if user_id not in fresh]
+        if stale:
+            computed = await self.compute_many(stale)
+            try:
+                await self._store(computed)
+            except Exception as e:
+                # Most likely a concurrent rebuild of the same users; the computed vectors are still current
+                logger.warning(f"Storing rebuilt skill vectors failed for {len(stale)} users: {e}")
+            vectors.update((user_id, vector) for user_id, vector in computed.items() if vector)
+        return vectors
+
+    async def get_breakdown(self, user_id: int) -> Dict[str, float]:
+        """Skill breakdown normalized to 0-100"""
+        return normalize(await self.get_vector(user_id))
+
+    async def compute_many(self, user_ids: List[int]) -> Dict[int, Dict[str, float]]:
+        """Compute vectors from UserSkill rows and completed enrollments in two queries"""
+        user_skills, completed_enrollments = await asyncio.gather(
+            prisma.userskill.find_many(where={"userId": {"in": user_ids}}),
+            prisma.enrollment.find_many(
+                where={"userId": {"in": user_ids}, "completedAt": {"not": None}},
+                include={"module": True}
+            )
+        )
+
+        vectors: Dict[int, Dict[str, float]] = {user_id: {} for user_id in user_ids}
+        for skill in user_skills:
+            vector = vectors[skill.userId]
+            vector[skill.name] = vector.get(skill.name, 0) + EXPLICIT_SKILL_WEIGHT
+        for enrollment in completed_enrollments:
+            if enrollment.module and enrollment.module.skills:
+                vector = vectors[enrollment.userId]
+                for skill in enrollment.module.skills:
+                    vector[skill] = vector.get(skill, 0) + COMPLETED_MODULE_SKILL_WEIGHT
+        return vectors
+
+    async def compute(self, user_id: int) -> Dict[str, float]:
+        """Compute a user's vector from UserSkill rows and completed enrollments"""
+        return (await self.compute_many([user_id]))[user_id]
+
+    async def rebuild_users(self, user_ids: List[int]) -> Dict[int, Dict[str, float]]:
+        """Recompute and replace the stored vectors of several users"""
+        vectors = await self.compute_many(user_ids)
+        await self._store(vectors)
+        return vectors
+
+    async def rebuild_user(self, user_id: int) -> Dict[str, float]:
+        """Recompute and replace a user's stored vector"""
+        return (await self.rebuild_users([user_id]))[user_id]
+
+    async def rebuild_all(self, batch_size: int = 500) -> int:
+        """Backfill vectors for every user, walking user ids in keyset pages"""
+        rebuilt = 0
+        last_id = 0
+        while True:
+            users = await prisma.user.find_many(
+                where={"id": {"gt": last_id}},
+                order={"id": "asc"},
+                take=batch_size
+            )
+            if not users:
+                break
+            await self.rebuild_users([user.id for user in users])
+            rebuilt += len(users)
+            last_id = users[-1].id
+            logger.info(f"Rebuilt skill vectors for {rebuilt} users (last id {last_id})")
+        return rebuilt
+
+    def stats(self) -> Dict[str, int]:
+        return {"rebuilt": self.rebuilt}
+
+    async def _store(self, vectors: Dict[int, Dict[str, float]]):
+        """Replace the weights and build markers of the given users in one transaction"""
+        user_ids = list(vectors)
+        built_at = datetime.utcnow()
+        async with prisma.batch_() as batcher:
+            batcher.userskillweight.delete_many(where={"userId": {"in": user_ids}})
+            rows = [
+                {"userId": user_id, "skill": skill, "weight": weight}
+                for user_id, vector in vectors.items()
+                for skill, weight in vector.items()
+            ]
+            if rows:
+                batcher.userskillweight.create_many(data=rows)
+            batcher.userskillvector.delete_many(where={"userId": {"in": user_ids}})
+            batcher.userskillvector.create_many(data=[
+                {"userId": user_id, "builtAt": built_at} for user_id in user_ids
+            ])
+        self.rebuilt += len(user_ids)
+
+
+# Singleton instance
+skill_vector_service = SkillVectorService(timedelta(seconds=settings.SKILL_VECTOR_MAX_AGE_SECONDS))
+
+
+async def _main(user_ids: List[int]):
+    await prisma.connect()
+    try:
+        if user_ids:
+            for user_id in user_ids:
+                await skill_vector_service.rebuild_user(user_id)
+            logger.info(f"Rebuilt skill vectors for {len(user_ids)} users")
+        else:
+            await skill_vector_service.rebuild_all()
+    finally:
+        await prisma.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main([int(arg) for arg in sys.argv[1:]]))
@@ -0,0 +1,373 @@
+import asyncio
+import logging
+import smtplib
+import ssl
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from email.message import Message
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _is_server_reply(error: Exception) -> bool:
+    """Whether the server answered the command, as opposed to the session failing.
+
+    smtplib puts the reply in ``smtp_code``, aiosmtplib in ``code``; refused
+    recipients carry theirs per address in ``recipients`` in both.
+    """
+    if isinstance(error, (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused)):
+        return True
+    return getattr(error, "code", None) is not None or bool(getattr(error, "recipients", None))
+
+
+@dataclass(frozen=True)
+class SmtpConfig:
+    host: str
+    port: int
+    username: Optional[str] = None
+    password: Optional[str] = None
+    use_ssl: bool = False
+    starttls: bool = True
+    timeout: float = 30.0
+
+    @property
+    def authenticated(self) -> bool:
+        return bool(self.username and self.password)
+
+    @classmethod
+    def from_settings(cls) -> "SmtpConfig":
+        return cls(
+            host=settings.SMTP_HOST,
+            port=settings.SMTP_PORT or (465 if settings.SMTP_USE_SSL else 587),
+            username=settings.SMTP_USER,
+            password=settings.SMTP_PASSWORD,
+            use_ssl=settings.SMTP_USE_SSL,
+            starttls=settings.SMTP_STARTTLS and not settings.SMTP_USE_SSL,
+            timeout=settings.SMTP_TIMEOUT_SECONDS
+        )
+
+
+class SmtpConnection:
+    """One SMTP session: connect (TLS and login included), send, keep alive, quit"""
+
+    async def open(self):
+        raise NotImplementedError
+
+    async def send(self, message: Message):
+        raise NotImplementedError
+
+    async def noop(self):
+        raise NotImplementedError
+
+    async def close(self):
+        raise NotImplementedError
+
+
+class ThreadedSmtpConnection(SmtpConnection):
+    """``smtplib`` session whose blocking calls run on a dedicated executor"""
+
+    def __init__(self, config: SmtpConfig, executor: ThreadPoolExecutor):
+        self.config = config
+        self._executor = executor
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    async def open(self):
+        self._smtp = await self._run(self._connect)
+
+    async def send(self, message: Message):
+        await self._run(self._smtp.send_message, message)
+
+    async def noop(self):
+        code, _ = await self._run(self._smtp.noop)
+        if code != 250:
+            raise smtplib.SMTPResponseException(code, "NOOP failed")
+
+    async def close(self):
+        if self._smtp is None:
+            return
+        smtp, self._smtp = self._smtp, None
+        try:
+            await self._run(smtp.quit)
+        except Exception:
+            smtp.close()
+
+    def _connect(self) -> smtplib.SMTP:
+        config = self.config
+        if config.use_ssl:
+            smtp = smtplib.SMTP_SSL(
+                config.host, config.port, timeout=config.timeout, context=ssl.create_default_context()
+            )
+        else:
+            smtp = smtplib.SMTP(config.host, config.port, timeout=config.timeout)
+        try:
+            if config.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+            if config.authenticated:
+                smtp.login(config.username, config.password)
+        except Exception:
+            smtp.close()
+            raise
+        return smtp
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+
+class AioSmtpConnection(SmtpConnection):
+    """Native asyncio session; requires the optional ``aiosmtplib`` package"""
+
+    def __init__(self, config: SmtpConfig):
+        import aiosmtplib
+
+        self.config = config
+        self._smtp = aiosmtplib.SMTP(
+            hostname=config.host,
+            port=config.port,
+            use_tls=config.use_ssl,
+            start_tls=config.starttls,
+            timeout=config.timeout
+        )
+
+    async def open(self):
+        await self._smtp.connect()
+        try:
+            if self.config.authenticated:
+                await self._smtp.login(self.config.username, self.config.password)
+        except Exception:
+            self._smtp.close()
+            raise
+
+    async def send(self, message: Message):
+        await self._smtp.send_message(message)
+
+    async def noop(self):
+        await self._smtp.noop()
+
+    async def close(self):
+        if not self._smtp.is_connected:
+            return
+        try:
+            await self._smtp.quit()
+        except Exception:
+            self._smtp.close()
+
+
+@dataclass
+class _PooledConnection:
+    connection: SmtpConnection
+    idle_since: float
+    messages: int = 0
+
+
+class SmtpTransport:
+    """Sends mail over pooled SMTP sessions without blocking the event loop.
+
+    Uses ``aiosmtplib`` when it is installed (or ``SMTP_TRANSPORT=aiosmtplib``)
+    and otherwise runs ``smtplib`` on a small dedicated thread pool of
+    ``SMTP_WORKERS`` threads.
+
+    Up to ``SMTP_POOL_SIZE`` authenticated sessions are kept open and reused,
+    so a burst of mail pays for the connect/STARTTLS/login handshake once per
+    session rather than once per message. Idle sessions are kept alive with
+    NOOP every ``SMTP_KEEPALIVE_SECONDS`` and closed after
+    ``SMTP_IDLE_TIMEOUT_SECONDS``; a session is retired after
+    ``SMTP_MAX_MESSAGES_PER_CONNECTION`` messages. A send that fails on a
+    reused session because the connection dropped is retried once on a new
+    one.
+
+    For local development, point it at an aiosmtpd stand-in::
+
+        python -m aiosmtpd -n -l localhost:1025
+        SMTP_HOST=localhost SMTP_PORT=1025 SMTP_STARTTLS=false
+    """
+
+    def __init__(
+        self,
+        config: SmtpConfig,
+        mode: str = "auto",
+        workers: int = 4,
+        pool_size: int = 4,
+        keepalive: float = 30.0,
+        idle_timeout: float = 120.0,
+        max_messages: int = 100
+    ):
+        self.config = config
+        self.mode = _resolve_mode(mode)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self.mode == "thread":
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp")
+        self.pool_size = pool_size
+        self.keepalive = keepalive
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self._slots = asyncio.Semaphore(pool_size)
+        # Most recently used last, so bursts keep reusing the warmest sessions
+        self._idle: List[_PooledConnection] = []
+        self._in_use = 0
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.sent = 0
+        self.failed = 0
+        self.connects = 0
+        self.reconnects = 0
+        self._send_seconds = 0.0
+
+    def connection(self) -> SmtpConnection:
+        if self.mode == "aiosmtplib":
+            return AioSmtpConnection(self.config)
+        return ThreadedSmtpConnection(self.config, self._executor)
+
+    async def send(self, message: Message):
+        started = time.perf_counter()
+        for attempt in range(2):
+            pooled, reused = await self._acquire(fresh=attempt > 0)
+            try:
+                await pooled.connection.send(message)
+            except Exception as e:
+                await self._release(pooled, healthy=False)
+                # A server reply (bad recipient, rejected data) is final; a dropped
+                # idle session is not, so try once more on a new connection
+                if attempt == 0 and reused and not _is_server_reply(e):
+                    self.reconnects += 1
+                    logger.info(f"SMTP session dropped ({e}), reconnecting")
+                    continue
+                self.failed += 1
+                raise
+            pooled.messages += 1
+            await self._release(pooled, healthy=True)
+            self.sent += 1
+            self._send_seconds += time.perf_counter() - started
+            return
+
+    async def send_many(self, messages: Sequence[Message]) -> List[Optional[Exception]]:
+        """Send messages over up to ``pool_size`` sessions; returns each message's error or None"""
+        results: List[Optional[Exception]] = [None] * len(messages)
+        pending = iter(range(len(messages)))
+
+        async def worker():
+            for index in pending:
+                try:
+                    await self.send(messages[index])
+                except Exception as e:
+                    results[index] = e
+
+        await asyncio.gather(*(worker() for _ in range(min(self.pool_size, len(messages)))))
+        return results
+
+    async def check(self) -> bool:
+        """Connect, negotiate TLS and log in, then quit"""
+        connection = self.connection()
+        try:
+            await connection.open()
+            await connection.close()
+            return True
+        except Exception as e:
+            logger.error(f"SMTP connection test failed: {e}")
+            return False
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._keepalive_loop())
+
+    async def stop(self):
+        """Stop the keepalive loop, quit idle sessions and release the executor"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(pooled.connection.close() for pooled in idle), return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "pool_size": self.pool_size,
+            "idle": len(self._idle),
+            "in_use": self._in_use,
+            "connects": self.connects,
+            "reconnects": self.reconnects,
+            "sent": self.sent,
+            "failed": self.failed,
+            "avg_send_ms": round(self._send_seconds / self.sent * 1000, 2) if self.sent else None,
+        }
+
+    async def _acquire(self, fresh: bool = False) -> Tuple[_PooledConnection, bool]:
+        await self._slots.acquire()
+        try:
+            now = time.monotonic()
+            while self._idle and not fresh:
+                pooled = self._idle.pop()
+                if now - pooled.idle_since < self.idle_timeout:
+                    self._in_use += 1
+                    return pooled, True
+                await pooled.connection.close()
+            connection = self.connection()
+            await connection.open()
+            self.connects += 1
+            self._in_use += 1
+            return _PooledConnection(connection, now), False
+        except Exception:
+            self._slots.release()
+            raise
+
+    async def _release(self, pooled: _PooledConnection, healthy: bool):
+        self._in_use -= 1
+        try:
+            if healthy and pooled.messages < self.max_messages:
+                pooled.idle_since = time.monotonic()
+                self._idle.append(pooled)
+            else:
+                await pooled.connection.close()
+        finally:
+            self._slots.release()
+
+    async def _keepalive_loop(self):
+        while True:
+            await asyncio.sleep(self.keepalive)
+            # Take the idle sessions out while probing them so senders cannot pick one mid-NOOP
+            idle, self._idle = self._idle, []
+            now = time.monotonic()
+            alive = []
+            for pooled in idle:
+                if now - pooled.idle_since >= self.idle_timeout:
+                    await pooled.connection.close()
+                    continue
+                try:
+                    await pooled.connection.noop()
+                    alive.append(pooled)
+                except Exception as e:
+                    logger.info(f"Idle SMTP session failed keepalive: {e}")
+                    await pooled.connection.close()
+            # Sessions released meanwhile are more recent, keep them on top
+            self._idle[:0] = alive
+
+
+def _resolve_mode(mode: str) -> str:
+    if mode == "thread":
+        return mode
+    try:
+        import aiosmtplib  # noqa: F401
+        return "aiosmtplib"
+    except ImportError:
+        if mode == "aiosmtplib":
+            raise RuntimeError("SMTP_TRANSPORT=aiosmtplib but the 'aiosmtplib' package is not installed")
+        return "thread"
+
+
+# Singleton instance
+smtp_transport = SmtpTransport(
+    SmtpConfig.from_settings(),
+    settings.SMTP_TRANSPORT,
+    workers=settings.SMTP_WORKERS,
+    pool_size=settings.SMTP_POOL_SIZE,
+    keepalive=settings.SMTP_KEEPALIVE_SECONDS,
+    idle_timeout=settings.SMTP_IDLE_TIMEOUT_SECONDS,
+    max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION
+)
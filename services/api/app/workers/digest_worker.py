@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import date
+from email.message import Message
+from typing import Any, Dict, List, Optional, Union
+from app.core.config import settings
+from app.core.prisma import prisma
+from app.services.email_service import EmailService, email_service
+from app.services.recommendation_service import RecommendationService, recommendation_service
+from app.services.skill_vector_service import skill_vector_service
+
+logger = logging.getLogger(__name__)
+
+_UTC_NOW = "(now() AT TIME ZONE 'UTC')"
+
+# Keyset page over the primary key; the checkpoint is the last id handed to the sender
+_SUBSCRIBERS_SQL = """
+SELECT "id", "email", "fullName" FROM "User"
+WHERE "id" > $1
+  AND "subscribeNewsletter"
+  AND "deletedAt" IS NULL
+  AND "email" IS NOT NULL
+ORDER BY "id"
+LIMIT $2
+"""
+
+_SUBSCRIBERS_BY_ID_SQL = """
+SELECT "id", "email", "fullName" FROM "User"
+WHERE "id" = ANY($1::int[])
+  AND "subscribeNewsletter"
+  AND "deletedAt" IS NULL
+  AND "email" IS NOT NULL
+ORDER BY "id"
+"""
+
+_ENROLLED_SQL = """
+SELECT "userId", "moduleId" FROM "Enrollment"
+WHERE "userId" = ANY($1::int[]) AND "deletedAt" IS NULL
+"""
+
+# "failed" is always the number of users still in "failedUserIds"
+_CHECKPOINT_SQL = f"""
+UPDATE "DigestRun"
+SET "lastUserId" = $2, "sent" = "sent" + $3, "skipped" = "skipped" + $4,
+    "failedUserIds" = "failedUserIds" || $5::int[], "failed" = cardinality("failedUserIds" || $5::int[]),
+    "updatedAt" = {_UTC_NOW}
+WHERE "key" = $1
+"""
+
+_RETRY_CHECKPOINT_SQL = f"""
+UPDATE "DigestRun"
+SET "sent" = "sent" + $2, "skipped" = "skipped" + $3,
+    "failedUserIds" = $4::int[], "failed" = cardinality($4::int[]),
+    "updatedAt" = {_UTC_NOW}
+WHERE "key" = $1
+"""
+
+_COMPLETE_SQL = f"""
+UPDATE "DigestRun"
+SET "status" = 'completed', "completedAt" = {_UTC_NOW}, "updatedAt" = {_UTC_NOW}
+WHERE "key" = $1
+"""
+
+
+@dataclass
+class _Batch:
+    last_user_id: int
+    user_ids: List[int]
+    messages: List[Message]
+    skipped: int
+
+
+class DigestPipeline:
+    """Sends the newsletter digest to every subscriber, one keyset page at a time.
+
+    A producer task reads ``page_size`` subscribers, loads their skill
+    vectors and enrollments with one query each, and renders a personalized
+    message per user from the in-memory recommendation index. A consumer
+    sends each rendered page with ``send_many`` over the pooled SMTP
+    sessions. At most ``prefetch`` rendered pages wait between the two, so
+    rendering overlaps sending while memory stays bounded by a few pages
+    whatever the subscriber count.
+
+    Progress is checkpointed in ``DigestRun`` after every page. Running the
+    same key again resumes after the last checkpointed user; a completed
+    run is not sent twice. A crash mid-page may resend that one page.
+
+    Users whose send fails are recorded in ``failedUserIds``. Once every
+    page is out they get up to ``retry_rounds`` more attempts,
+    ``retry_delay`` seconds apart, and running a completed key again retries
+    whoever is still left.
+
+        python -m app.workers.digest_worker [run-key]
+    """
+
+    def __init__(
+        self,
+        service: EmailService,
+        recommendations: RecommendationService,
+        page_size: int,
+        prefetch: int,
+        render_chunk: int,
+        per_user: int,
+        retry_rounds: int,
+        retry_delay: float
+    ):
+        self.service = service
+        self.recommendations = recommendations
+        self.page_size = page_size
+        self.prefetch = prefetch
+        self.render_chunk = render_chunk
+        self.per_user = per_user
+        self.retry_rounds = retry_rounds
+        self.retry_delay = retry_delay
+
+    async def run(self, key: str) -> Dict[str, Any]:
+        run = await prisma.digestrun.upsert(
+            where={"key": key},
+            data={"create": {"key": key}, "update": {}}
+        )
+        failed_ids = list(run.failedUserIds)
+        if run.status == "completed" and not failed_ids:
+            logger.info(f"Digest {key} already completed ({run.sent} sent), nothing to do")
+            return self._summary(run.sent, 0, run.skipped)
+
+        sent, skipped = run.sent, run.skipped
+        started = time.perf_counter()
+        if run.status != "completed":
+            if run.lastUserId:
+                logger.info(f"Resuming digest {key} after user {run.lastUserId} ({run.sent} sent so far)")
+            sent, skipped = await self._send_all(key, run.lastUserId, sent, skipped, failed_ids)
+            await prisma.execute_raw(_COMPLETE_SQL, key)
+            elapsed = time.perf_counter() - started
+            logger.info(
+                f"Digest {key} completed: {sent} sent, {len(failed_ids)} failed, {skipped} skipped in {elapsed:.1f}s"
+            )
+
+        for _ in range(self.retry_rounds):
+            if not failed_ids:
+                break
+            await asyncio.sleep(self.retry_delay)
+            logger.info(f"Digest {key}: retrying {len(failed_ids)} failed recipients")
+            retried_sent, retried_skipped, failed_ids = await self._retry(key, failed_ids)
+            sent += retried_sent
+            skipped += retried_skipped
+        if failed_ids:
+            logger.warning(f"Digest {key}: {len(failed_ids)} recipients still failed; run the key again to retry")
+        return self._summary(sent, len(failed_ids), skipped)
+
+    async def _send_all(self, key: str, after_id: int, sent: int, skipped: int, failed_ids: List[int]):
+        """Send every page after ``after_id``; failed user ids are appended to ``failed_ids``"""
+        queue: "asyncio.Queue[Union[_Batch, Exception, None]]" = asyncio.Queue(maxsize=self.prefetch)
+        producer = asyncio.create_task(self._produce(after_id, queue))
+        try:
+            batches = 0
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+
+                batch_started = time.perf_counter()
+                results = await self.service.transport.send_many(batch.messages)
+                batch_failed = [user_id for user_id, error in zip(batch.user_ids, results) if error is not None]
+                batch_sent = len(results) - len(batch_failed)
+                await prisma.execute_raw(
+                    _CHECKPOINT_SQL, key, batch.last_user_id, batch_sent, batch.skipped, batch_failed
+                )
+
+                batches += 1
+                sent += batch_sent
+                failed_ids.extend(batch_failed)
+                skipped += batch.skipped
+                elapsed = time.perf_counter() - batch_started
+                rate = len(results) / elapsed if elapsed > 0 else 0.0
+                logger.info(
+                    f"Digest {key} batch {batches}: {batch_sent} sent, {len(batch_failed)} failed, "
+                    f"{batch.skipped} skipped in {elapsed:.2f}s ({rate:.0f} msg/s); "
+                    f"through user {batch.last_user_id}, {sent} sent in total"
+                )
+        finally:
+            producer.cancel()
+        return sent, skipped
+
+    async def _retry(self, key: str, user_ids: List[int]):
+        """One more attempt for each failed user, a page at a time; returns (sent, skipped, still failed)"""
+        sent = skipped = 0
+        still_failed: List[int] = []
+        for start in range(0, len(user_ids), self.page_size):
+            # Users who unsubscribed or were deleted since are dropped
+            users = await prisma.query_raw(_SUBSCRIBERS_BY_ID_SQL, user_ids[start:start + self.page_size])
+            page_sent = page_skipped = 0
+            if users:
+                batch = await self._render_page(users, users[-1]["id"])
+                results = await self.service.transport.send_many(batch.messages)
+                still_failed.extend(user_id for user_id, error in zip(batch.user_ids, results) if error is not None)
+                page_sent = sum(1 for error in results if error is None)
+                page_skipped = batch.skipped
+            remaining = still_failed + user_ids[start + self.page_size:]
+            await prisma.execute_raw(_RETRY_CHECKPOINT_SQL, key, page_sent, page_skipped, remaining)
+            sent += page_sent
+            skipped += page_skipped
+        return sent, skipped, still_failed
+
+    async def _produce(self, after_id: int, queue: "asyncio.Queue[Union[_Batch, Exception, None]]"):
+        """Fetch and render pages ahead of the sender; ends with None, or the error that stopped it"""
+        try:
+            while True:
+                users = await prisma.query_raw(_SUBSCRIBERS_SQL, after_id, self.page_size)
+                if not users:
+                    break
+                after_id = users[-1]["id"]
+                await queue.put(await self._render_page(users, after_id))
+                if len(users) < self.page_size:
+                    break
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(None)
+
+    async def _render_page(self, users: List[Dict[str, Any]], last_user_id: int) -> _Batch:
+        user_ids = [user["id"] for user in users]
+        vectors, enrollments = await asyncio.gather(
+            skill_vector_service.get_vectors(user_ids),
+            prisma.query_raw(_ENROLLED_SQL, user_ids)
+        )
+        enrolled: Dict[int, List[int]] = {}
+        for row in enrollments:
+            enrolled.setdefault(row["userId"], []).append(row["moduleId"])
+
+        sent_to: List[int] = []
+        messages: List[Message] = []
+        skipped = 0
+        for position, user in enumerate(users, 1):
+            try:
+                message = self._render(user, vectors.get(user["id"], {}), enrolled.get(user["id"], []))
+            except Exception as e:
+                logger.warning(f"Digest render failed for user {user['id']}: {e}")
+                message = None
+            if message is None:
+                skipped += 1
+            else:
+                sent_to.append(user["id"])
+                messages.append(message)
+            # Rendering is CPU-bound; let in-flight sends progress between chunks
+            if position % self.render_chunk == 0:
+                await asyncio.sleep(0)
+        return _Batch(last_user_id, sent_to, messages, skipped)
+
+    def _render(self, user: Dict[str, Any], vector: Dict[str, float], enrolled: List[int]) -> Optional[Message]:
+        items = self.recommendations.recommend(user["id"], vector, enrolled, limit=self.per_user)
+        if not items:
+            return None
+        name = user["fullName"] or user["email"].split("@")[0]
+        return self.service.build_digest_email(user["id"], user["email"], name, items)
+
+    @staticmethod
+    def _summary(sent: int, failed: int, skipped: int) -> Dict[str, Any]:
+        return {"sent": sent, "failed": failed, "skipped": skipped}
+
+
+# Singleton instance
+digest_pipeline = DigestPipeline(
+    email_service,
+    recommendation_service,
+    settings.DIGEST_PAGE_SIZE,
+    settings.DIGEST_PREFETCH_PAGES,
+    settings.DIGEST_RENDER_CHUNK,
+    settings.DIGEST_RECOMMENDATIONS,
+    settings.DIGEST_RETRY_ROUNDS,
+    settings.DIGEST_RETRY_DELAY_SECONDS
+)
+
+
+async def _main(key: str):
+    await prisma.connect()
+    transport = email_service.transport
+    transport.start()
+    try:
+        await recommendation_service.refresh()
+        await digest_pipeline.run(key)
+    finally:
+        await transport.stop()
+        await prisma.disconnect()
+
+
+if __name__ == "__main__":
+    year, week, _ = date.today().isocalendar()
+    parser = argparse.ArgumentParser(description="Send the newsletter digest to all subscribers")
+    parser.add_argument("key", nargs="?", default=f"digest-{year}-W{week:02d}",
+                        help="Run key; rerunning a key resumes it (default: this ISO week)")
+    args = parser.parse_args()
+    logging.basicConfig(level=settings.LOG_LEVEL.upper())
+    asyncio.run(_main(args.key))
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import signal
+import time
+from email.message import Message
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.prisma import prisma
+from app.services.email_outbox import EmailOutbox, email_outbox
+from app.services.email_service import EmailService, email_service
+
+logger = logging.getLogger(__name__)
+
+# Builds the message for each outbox kind from its payload
+_RENDERERS: Dict[str, Callable[[EmailService, str, Dict[str, Any]], Message]] = {
+    "verification": lambda service, to, payload: service.build_verification_email(to, payload["token"], payload["name"]),
+    "password_reset": lambda service, to, payload: service.build_password_reset_email(to, payload["token"], payload["name"]),
+    "notification": lambda service, to, payload: service.build_notification_email(
+        to, payload["subject"], payload["text"], payload.get("html")
+    ),
+}
+
+
+class EmailWorker:
+    """Drains the email outbox through the pooled SMTP transport.
+
+    Each pass claims up to ``batch_size`` due messages, renders them, sends
+    them with ``send_many`` and records the outcome with two batched
+    statements. Full batches are followed immediately by the next pass;
+    otherwise the worker sleeps ``poll_interval``.
+
+    Runs inside the API process when ``EMAIL_WORKER_IN_PROCESS`` is set, or
+    on its own (any number of instances) with::
+
+        python -m app.workers.email_worker
+    """
+
+    def __init__(self, outbox: EmailOutbox, service: EmailService, batch_size: int, poll_interval: float):
+        self.outbox = outbox
+        self.service = service
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._task: Optional["asyncio.Task[None]"] = None
+        self.disabled_reason: Optional[str] = None
+        self.sent = 0
+        self.failed = 0
+        self.batches = 0
+        self.last_batch_at: Optional[float] = None
+
+    async def run_once(self) -> int:
+        """Process one batch; returns how many messages were claimed"""
+        rows = await self.outbox.claim(self.batch_size)
+        if not rows:
+            return 0
+
+        failures: List[Tuple[int, str]] = []
+        ready: List[Tuple[int, Message]] = []
+        for row in rows:
+            try:
+                render = _RENDERERS[row["kind"]]
+                ready.append((row["id"], render(self.service, row["toEmail"], row["payload"])))
+            except Exception as e:
+                failures.append((row["id"], f"render: {e!r}"))
+
+        results = await self.service.transport.send_many([message for _, message in ready])
+        sent_ids = []
+        for (message_id, _), error in zip(ready, results):
+            if error is None:
+                sent_ids.append(message_id)
+            else:
+                failures.append((message_id, repr(error)))
+
+        await self.outbox.mark_sent(sent_ids)
+        await self.outbox.mark_failed(failures)
+
+        self.sent += len(sent_ids)
+        self.failed += len(failures)
+        self.batches += 1
+        self.last_batch_at = time.time()
+        if failures:
+            logger.warning(f"Email batch: {len(sent_ids)} sent, {len(failures)} failed")
+        else:
+            logger.info(f"Email batch: {len(sent_ids)} sent")
+        return len(rows)
+
+    def start(self):
+        if not self.service.check_smtp_config():
+            # Producers keep enqueueing, so the backlog grows until SMTP is configured;
+            # /api/debug/metrics shows it under email_outbox
+            self.disabled_reason = "SMTP not configured"
+            logger.warning(
+                "Email worker NOT started: SMTP is not configured. Outbox messages (verification, "
+                "password reset, notifications) will stay pending until it is"
+            )
+            return
+        self.disabled_reason = None
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None,
+            "disabled_reason": self.disabled_reason,
+            "sent": self.sent,
+            "failed": self.failed,
+            "batches": self.batches,
+            "last_batch_at": self.last_batch_at,
+        }
+
+    async def _run_loop(self):
+        while True:
+            try:
+                claimed = await self.run_once()
+            except Exception as e:
+                logger.error(f"Email worker pass failed: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+
+# Singleton instance
+email_worker = EmailWorker(
+    email_outbox,
+    email_service,
+    settings.EMAIL_OUTBOX_BATCH_SIZE,
+    settings.EMAIL_OUTBOX_POLL_SECONDS
+)
+
+
+async def _main():
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await prisma.connect()
+    transport = email_service.transport
+    transport.start()
+    email_worker.start()
+    try:
+        await stopping.wait()
+    finally:
+        await email_worker.stop()
+        await transport.stop()
+        await prisma.disconnect()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=settings.LOG_LEVEL.upper())
+    asyncio.run(_main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Email rendering throughput.
+
+Renders verification and password reset emails for distinct recipients:
+the HTML and text parts alone, then the complete MIME message as the
+email worker builds it. Run from services/api with the app's .env in place:
+
+    python benchmark_email_templates.py [messages]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# MIME headers need a sender even where SMTP is not configured
+os.environ.setdefault("SMTP_FROM_EMAIL", "benchmark@example.com")
+
+from app.services.email_service import email_service
+from app.services.email_templates import EmailTemplates, email_templates
+
+
+def throughput(fn, count):
+    started = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    elapsed = time.perf_counter() - started
+    return count / elapsed, elapsed / count * 1e6
+
+
+def main(count: int):
+    started = time.perf_counter()
+    EmailTemplates()
+    compile_ms = (time.perf_counter() - started) * 1000
+
+    results = {
+        "render verification": throughput(
+            lambda i: email_templates.render(
+                "verification", name=f"User {i}", url=f"https://example.com/verify?token={i}", email=f"user{i}@example.com"
+            ),
+            count
+        ),
+        "render password reset": throughput(
+            lambda i: email_templates.render(
+                "password_reset", name=f"User {i}", url=f"https://example.com/reset?token={i}", email=f"user{i}@example.com"
+            ),
+            count
+        ),
+        "MIME verification": throughput(
+            lambda i: email_service.build_verification_email(f"user{i}@example.com", f"token-{i}", f"User {i}").as_bytes(),
+            count
+        ),
+    }
+
+    print(f"Messages: {count} (template compile: {compile_ms:.1f} ms, once per process)")
+    for label, (per_second, per_message_us) in results.items():
+        print(f"{label + ':':24} {per_second:10.0f} msg/s {per_message_us:10.1f} us/msg")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
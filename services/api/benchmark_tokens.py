@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Per-request cost of access token verification.
+
+Compares python-jose with the TokenService fast path, cold (every token
+new) and warm (the same bearer token seen again). Run from services/api
+with the app's .env in place:
+
+    python benchmark_tokens.py [iterations]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jose import jwt
+from app.core.tokens import TokenService
+
+
+def per_call_us(fn, tokens):
+    started = time.perf_counter()
+    for token in tokens:
+        fn(token)
+    return (time.perf_counter() - started) / len(tokens) * 1e6
+
+
+def main(iterations: int):
+    secret, algorithm = "benchmark-secret", "HS256"
+    service = TokenService(secret, algorithm, max_cached=iterations)
+    expires = datetime.utcnow() + timedelta(days=30)
+    tokens = [service.encode({"sub": str(i), "exp": expires, "type": "access"}) for i in range(iterations)]
+
+    jose_us = per_call_us(lambda t: jwt.decode(t, secret, algorithms=[algorithm]), tokens)
+    cold_us = per_call_us(service.decode, tokens)
+    warm_us = per_call_us(service.decode, tokens)
+    encode_us = per_call_us(
+        lambda i: service.encode({"sub": str(i), "exp": expires, "type": "access"}), range(iterations)
+    )
+    jose_encode_us = per_call_us(
+        lambda i: jwt.encode({"sub": str(i), "exp": expires, "type": "access"}, secret, algorithm=algorithm),
+        range(iterations)
+    )
+
+    print(f"Tokens: {iterations}")
+    print(f"jose decode:          {jose_us:8.2f} us/request")
+    print(f"TokenService (cold):  {cold_us:8.2f} us/request")
+    print(f"TokenService (warm):  {warm_us:8.2f} us/request")
+    print(f"jose encode:          {jose_encode_us:8.2f} us/token")
+    print(f"TokenService encode:  {encode_us:8.2f} us/token")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
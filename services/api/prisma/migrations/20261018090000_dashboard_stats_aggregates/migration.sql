@@ -0,0 +1,11 @@
+-- AlterTable
+ALTER TABLE "Contract" ADD COLUMN     "amountCents" INTEGER;
+
+-- CreateIndex
+CREATE INDEX "Contract_freelancerId_status_idx" ON "Contract"("freelancerId", "status");
+
+-- CreateIndex
+CREATE INDEX "Contract_clientId_status_idx" ON "Contract"("clientId", "status");
+
+-- CreateIndex
+CREATE INDEX "Enrollment_userId_completedAt_idx" ON "Enrollment"("userId", "completedAt");
@@ -0,0 +1,19 @@
+-- CreateTable
+CREATE TABLE "UserDashboardSummary" (
+    "userId" INTEGER NOT NULL,
+    "totalCourses" INTEGER NOT NULL DEFAULT 0,
+    "completedCourses" INTEGER NOT NULL DEFAULT 0,
+    "totalContracts" INTEGER NOT NULL DEFAULT 0,
+    "activeProjects" INTEGER NOT NULL DEFAULT 0,
+    "completedProjects" INTEGER NOT NULL DEFAULT 0,
+    "datasetsCount" INTEGER NOT NULL DEFAULT 0,
+    "certificationsCount" INTEGER NOT NULL DEFAULT 0,
+    "totalEarningsCents" INTEGER NOT NULL DEFAULT 0,
+    "rebuiltAt" TIMESTAMP(3),
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "UserDashboardSummary_pkey" PRIMARY KEY ("userId")
+);
+
+-- AddForeignKey
+ALTER TABLE "UserDashboardSummary" ADD CONSTRAINT "UserDashboardSummary_userId_fkey" FOREIGN KEY ("userId") REFERENCES "User"("id") ON DELETE RESTRICT ON UPDATE CASCADE;
@@ -0,0 +1,14 @@
+-- CreateIndex
+CREATE INDEX "Contract_freelancerId_updatedAt_idx" ON "Contract"("freelancerId", "updatedAt");
+
+-- CreateIndex
+CREATE INDEX "Contract_clientId_updatedAt_idx" ON "Contract"("clientId", "updatedAt");
+
+-- CreateIndex
+CREATE INDEX "Certificate_userId_issuedAt_idx" ON "Certificate"("userId", "issuedAt");
+
+-- CreateIndex
+CREATE INDEX "Delivery_contractId_deliveredAt_idx" ON "Delivery"("contractId", "deliveredAt");
+
+-- CreateIndex
+CREATE INDEX "Insight_userId_createdAt_idx" ON "Insight"("userId", "createdAt");
@@ -0,0 +1,16 @@
+-- CreateTable
+CREATE TABLE "UserSkillWeight" (
+    "id" SERIAL NOT NULL,
+    "userId" INTEGER NOT NULL,
+    "skill" TEXT NOT NULL,
+    "weight" DOUBLE PRECISION NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "UserSkillWeight_pkey" PRIMARY KEY ("id")
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "UserSkillWeight_userId_skill_key" ON "UserSkillWeight"("userId", "skill");
+
+-- AddForeignKey
+ALTER TABLE "UserSkillWeight" ADD CONSTRAINT "UserSkillWeight_userId_fkey" FOREIGN KEY ("userId") REFERENCES "User"("id") ON DELETE RESTRICT ON UPDATE CASCADE;
@@ -0,0 +1,19 @@
+-- AlterTable: store a SHA-256 digest of each token instead of the token itself
+ALTER TABLE "AuthToken" ADD COLUMN "tokenHash" TEXT;
+
+-- Backfill digests so tokens already sent by email keep working
+UPDATE "AuthToken" SET "tokenHash" = encode(sha256(convert_to("token", 'UTF8')), 'hex');
+
+ALTER TABLE "AuthToken" ALTER COLUMN "tokenHash" SET NOT NULL;
+
+-- DropIndex
+DROP INDEX "AuthToken_token_key";
+
+-- AlterTable
+ALTER TABLE "AuthToken" DROP COLUMN "token";
+
+-- CreateIndex
+CREATE UNIQUE INDEX "AuthToken_tokenHash_key" ON "AuthToken"("tokenHash");
+
+-- CreateIndex
+CREATE INDEX "AuthToken_type_expiresAt_idx" ON "AuthToken"("type", "expiresAt");
@@ -0,0 +1,10 @@
+-- CreateTable
+CREATE TABLE "UserSkillVector" (
+    "userId" INTEGER NOT NULL,
+    "builtAt" TIMESTAMP(3) NOT NULL,
+
+    CONSTRAINT "UserSkillVector_pkey" PRIMARY KEY ("userId")
+);
+
+-- AddForeignKey
+ALTER TABLE "UserSkillVector" ADD CONSTRAINT "UserSkillVector_userId_fkey" FOREIGN KEY ("userId") REFERENCES "User"("id") ON DELETE RESTRICT ON UPDATE CASCADE;
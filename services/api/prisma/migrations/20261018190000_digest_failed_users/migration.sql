@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "DigestRun" ADD COLUMN     "failedUserIds" INTEGER[] DEFAULT ARRAY[]::INTEGER[];
@@ -0,0 +1,5 @@
+-- AlterTable
+ALTER TABLE "Contract" DROP COLUMN "amountCents";
+
+-- AlterTable
+ALTER TABLE "UserDashboardSummary" ALTER COLUMN "totalEarningsCents" SET DATA TYPE BIGINT;
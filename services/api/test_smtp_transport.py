@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Exercise SmtpTransport against a local aiosmtpd server.
+
+Needs the ``aiosmtpd`` package (``pip install aiosmtpd``) and the usual
+``.env``; the SMTP settings in it are not used. Runs the smtplib transport,
+and the aiosmtplib one too when that package is installed:
+
+    python test_smtp_transport.py
+"""
+import asyncio
+import socket
+import sys
+from email.message import EmailMessage
+from aiosmtpd.controller import Controller
+from app.services.smtp_transport import SmtpConfig, SmtpTransport
+
+
+class Recorder:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+class Rejecting:
+    """Accepts one message, then rejects every later one at RCPT or at DATA"""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.accepted = 0
+        self.attempts = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if self.accepted and self.stage == "RCPT":
+            self.attempts += 1
+            return "550 No such user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.accepted and self.stage == "DATA":
+            self.attempts += 1
+            return "554 Message rejected"
+        self.accepted += 1
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def message(index: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "noreply@podacium.test"
+    msg["To"] = f"user{index}@podacium.test"
+    msg["Subject"] = f"Test {index}"
+    msg.set_content(f"Message {index}")
+    return msg
+
+
+def check(condition: bool, label: str) -> bool:
+    print(f"{'✅' if condition else '❌'} {label}")
+    return condition
+
+
+async def test_transport(mode: str) -> bool:
+    print(f"🧪 Testing SmtpTransport ({mode})...")
+    port = free_port()
+    recorder = Recorder()
+    server = Controller(recorder, hostname="127.0.0.1", port=port)
+    server.start()
+
+    config = SmtpConfig(host="127.0.0.1", port=port, starttls=False, timeout=5)
+    transport = SmtpTransport(config, mode, workers=2, pool_size=2)
+    ok = True
+    try:
+        # Sequential sends reuse one session
+        for index in range(5):
+            await transport.send(message(index))
+        ok &= check(len(recorder.messages) == 5, f"5 sequential sends delivered ({len(recorder.messages)})")
+        ok &= check(transport.connects == 1, f"sequential sends reused one session (connects={transport.connects})")
+
+        # A batch spreads over at most pool_size sessions
+        results = await transport.send_many([message(index) for index in range(5, 25)])
+        ok &= check(all(error is None for error in results), "send_many delivered every message")
+        ok &= check(len(recorder.messages) == 25, f"25 messages delivered in total ({len(recorder.messages)})")
+        ok &= check(transport.connects <= 2, f"batch stayed within the pool (connects={transport.connects})")
+
+        # Restart the server: pooled sessions are now dead and the next send must reconnect
+        server.stop()
+        server = Controller(recorder, hostname="127.0.0.1", port=port)
+        server.start()
+        await transport.send(message(25))
+        ok &= check(len(recorder.messages) == 26, "send after a dropped session delivered")
+        ok &= check(transport.reconnects == 1, f"dropped session was replaced (reconnects={transport.reconnects})")
+
+        # Rejections are final: raised, and not retried on a new session
+        for index, stage in enumerate(("RCPT", "DATA")):
+            rejecting = Rejecting(stage)
+            server.stop()
+            server = Controller(rejecting, hostname="127.0.0.1", port=port)
+            server.start()
+            await transport.send(message(26 + 2 * index))  # reconnects after the restart
+            reconnects = transport.reconnects
+            try:
+                await transport.send(message(27 + 2 * index))
+                ok &= check(False, f"rejection at {stage} raised")
+            except Exception as e:
+                ok &= check(True, f"rejection at {stage} raised {type(e).__name__}")
+            ok &= check(
+                rejecting.attempts == 1 and transport.reconnects == reconnects,
+                f"rejection at {stage} was not retried (attempts={rejecting.attempts})"
+            )
+        print(f"📊 {transport.stats()}")
+    except Exception as e:
+        print(f"❌ SmtpTransport ({mode}) failed: {e}")
+        import traceback
+        traceback.print_exc()
+        ok = False
+    finally:
+        await transport.stop()
+        server.stop()
+    return ok
+
+
+async def main() -> bool:
+    ok = await test_transport("thread")
+    try:
+        import aiosmtplib  # noqa: F401
+        ok &= await test_transport("aiosmtplib")
+    except ImportError:
+        print("ℹ️ aiosmtplib not installed, skipping its transport")
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)